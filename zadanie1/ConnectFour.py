@@ -22,6 +22,8 @@ class ConnectFour(TwoPlayerGame):
         self.players = players
         self.board = np.array([[0 for _ in range(7)] for _ in range(6)])  # initialize 6x7 board
         self.current_player = 1  # player 1 starts
+        self.last_move = None  # (row, column) of the last dropped disc
+        self.last_win = None  # cached win() result for the current position, None if not computed yet
 
     def possible_moves(self):
         """
@@ -38,6 +40,8 @@ class ConnectFour(TwoPlayerGame):
         """
         line = np.argmin(self.board[:, column] != 0)  # return first occurrence of a non-zero element in given column
         self.board[line, column] = self.current_player  # set player move in the game board
+        self.last_move = (line, column)
+        self.last_win = None  # new position, the cached result is no longer valid
 
     def show(self):
         """
@@ -54,7 +58,12 @@ class ConnectFour(TwoPlayerGame):
         Returns:
             Bool: True or False
         """
-        return find_four(self.board, self.opponent_index)  # return true if four in the row
+        if self.last_win is None:
+            if self.last_move is None:  # no move made through make_move, scan the whole board
+                self.last_win = find_four(self.board, self.opponent_index)
+            else:  # only lines through the last disc can contain a new four
+                self.last_win = find_four_at(self.board, *self.last_move)
+        return self.last_win  # return true if four in the row
 
     def is_over(self):
         """
@@ -103,6 +112,59 @@ def find_four(board, current_player):
     return False
 
 
+def find_four_at(board, row, column):
+    """
+    Check for four identical tokens only on the lines going through the token at (row, column).
+    A new four can only appear on the row, the column or one of the two diagonals of the last dropped disc,
+    so it is enough to count tokens of the same player in both directions of each line.
+
+    Parameters:
+        board (array): game board
+        row (int): row of the last dropped disc
+        column (int): column of the last dropped disc
+    Returns:
+        Bool: True or False
+    """
+    player = board[row, column]
+    for d_row, d_column in LINE_DIR:
+        streak = 1
+        for sign in (1, -1):  # walk forward and backward along the line
+            r, c = row + sign * d_row, column + sign * d_column
+            while (0 <= r <= 5) and (0 <= c <= 6) and board[r, c] == player:
+                streak += 1
+                r, c = r + sign * d_row, c + sign * d_column
+        if streak >= 4:
+            return True
+    return False
+
+
+def find_four_batch(boards):
+    """
+    Check the win condition of both players on many boards at once.
+    Instead of walking the lines, the boolean board of a player is shifted by 0, 1, 2 and 3 cells in every
+    direction and the shifted copies are combined with logical and, a True left in the result is the first
+    token of four in a row. All boards are checked by the same array operations, without a Python loop.
+
+    Parameters:
+        boards (array): game boards stacked into an array of shape (N, 6, 7)
+    Returns:
+        array: Bool array of shape (N, 2), column 0 for player 1 and column 1 for player 2
+    """
+    boards = np.asarray(boards)
+    wins = np.empty((len(boards), 2), dtype=bool)
+    for player in (1, 2):
+        tokens = boards == player
+        wins[:, player - 1] = (
+            (tokens[:, :, :4] & tokens[:, :, 1:5] & tokens[:, :, 2:6] & tokens[:, :, 3:]).any(axis=(1, 2)) |  # rows
+            (tokens[:, :3] & tokens[:, 1:4] & tokens[:, 2:5] & tokens[:, 3:]).any(axis=(1, 2)) |  # columns
+            (tokens[:, :3, :4] & tokens[:, 1:4, 1:5] & tokens[:, 2:5, 2:6] & tokens[:, 3:, 3:]).any(axis=(1, 2)) |
+            (tokens[:, :3, 3:] & tokens[:, 1:4, 2:6] & tokens[:, 2:5, 1:5] & tokens[:, 3:, :4]).any(axis=(1, 2)))
+    return wins
+
+
+# directions of the row, column and both diagonals going through a single position
+LINE_DIR = ((0, 1), (1, 0), (1, 1), (1, -1))
+
 # define starting positions with direction
 POS_DIR = (
     np.array([[[i, 0], [0, 1]] for i in range(6)] +  # rows [0, 0] to [5, 0] in direction [0, 1]
@@ -0,0 +1,198 @@
+# Author: Adrian Paczewski
+# Author: Kamil Kornatowski
+
+# Benchmarks of the Connect Four implementations and AI algorithms.
+# Negamax speed is measured in nodes per second, every searched node is one make_move call,
+# so the game classes are wrapped to count them.
+
+# usage: python benchmark.py --depths 5 6 7
+#        python benchmark.py --solver --depths 5 6 7
+#        python benchmark.py --parallel 1 2 4 8 --depths 10 12
+#        python benchmark.py --batch 10000
+
+import argparse
+import random
+import time
+
+import numpy as np
+from easyAI import Negamax
+
+from ConnectFour import ConnectFour, find_four, find_four_batch
+from bitboard import BitboardConnectFour
+from parallel import ParallelSolver
+from solver import Solver
+
+# positions (sequences of columns) searched in the benchmark
+OPENINGS = ([], [3], [3, 3], [3, 2, 4], [2, 3, 3, 4])
+
+
+def counting(game_class):
+    """
+    Wrap game class so every make_move call is counted as a searched node
+    Parameters:
+        game_class (class): TwoPlayerGame subclass
+    Returns:
+        class: Subclass with a class level 'nodes' counter
+    """
+    class Counting(game_class):
+        nodes = 0
+
+        def make_move(self, column):
+            Counting.nodes += 1
+            game_class.make_move(self, column)
+
+    Counting.__name__ = game_class.__name__
+    return Counting
+
+
+def search(game_class, depth, openings=OPENINGS):
+    """
+    Run Negamax(depth) from every opening position
+    Parameters:
+        game_class (class): TwoPlayerGame subclass
+        depth (int): search depth
+        openings (list): move sequences played before the search
+    Returns:
+        tuple: chosen moves, searched nodes and elapsed seconds
+    """
+    game_class = counting(game_class)
+    moves, elapsed = [], 0.0
+    for opening in openings:
+        game = game_class([None, None])
+        for column in opening:
+            game.play_move(column)
+        game_class.nodes -= len(opening)
+        start = time.perf_counter()
+        moves.append(Negamax(depth)(game))
+        elapsed += time.perf_counter() - start
+    return moves, game_class.nodes, elapsed
+
+
+def compare(game_classes, depths):
+    """
+    Print nodes per second of each game class and its speedup over the first one
+    Parameters:
+        game_classes (list): TwoPlayerGame subclasses, the first one is the baseline
+        depths (list): search depths
+    """
+    print('%-22s %5s %10s %9s %12s %8s' % ('game', 'depth', 'nodes', 'seconds', 'nodes/s', 'speedup'))
+    for depth in depths:
+        baseline_moves, baseline_rate = None, None
+        for game_class in game_classes:
+            moves, nodes, elapsed = search(game_class, depth)
+            rate = nodes / elapsed
+            if baseline_moves is None:
+                baseline_moves, baseline_rate = moves, rate
+            elif moves != baseline_moves:
+                print('  ! %s chose %s, baseline chose %s' % (game_class.__name__, moves, baseline_moves))
+            print('%-22s %5d %10d %9.3f %12.0f %7.1fx' % (game_class.__name__, depth, nodes, elapsed, rate,
+                                                          rate / baseline_rate))
+
+
+def compare_solver(depths):
+    """
+    Give Solver the wall time Negamax(depth) needs on ConnectFour and print how deep Solver gets in that time
+    Parameters:
+        depths (list): Negamax search depths
+    """
+    print('%-8s %7s %9s %13s %12s' % ('opening', 'negamax', 'seconds', 'solver depth', 'solver nodes'))
+    for depth in depths:
+        for opening in OPENINGS:
+            game = ConnectFour([None, None])
+            for column in opening:
+                game.play_move(column)
+            start = time.perf_counter()
+            Negamax(depth)(game)
+            elapsed = time.perf_counter() - start
+            solver = Solver(time_budget=elapsed)
+            solver(game)
+            print('%-8s %7d %9.3f %13d %12d' % (''.join(map(str, opening)) or '-', depth, elapsed, solver.depth,
+                                                solver.nodes))
+
+
+def compare_parallel(depths, processes):
+    """
+    Print the time of a fixed depth search for every number of worker processes and the speedup over one process
+    Parameters:
+        depths (list): search depths
+        processes (list): numbers of worker processes
+    """
+    print('%-9s %5s %9s %8s' % ('processes', 'depth', 'seconds', 'speedup'))
+    for depth in depths:
+        baseline = None
+        for count in processes:
+            with ParallelSolver(processes=count, max_depth=depth, time_budget=float('inf')) as ai:
+                ai.start()  # do not count the worker start-up
+                elapsed = 0.0
+                for opening in OPENINGS:
+                    game = ConnectFour([None, None])
+                    for column in opening:
+                        game.play_move(column)
+                    start = time.perf_counter()
+                    ai(game)
+                    elapsed += time.perf_counter() - start
+            baseline = baseline or elapsed
+            print('%-9d %5d %9.3f %7.1fx' % (count, depth, elapsed, baseline / elapsed))
+
+
+def random_boards(count, seed=0):
+    """
+    Play random games and stack their final positions
+    Parameters:
+        count (int): number of boards
+        seed (int): random seed
+    Returns:
+        array: boards of shape (count, 6, 7)
+    """
+    rng = random.Random(seed)
+    boards = np.empty((count, 6, 7), dtype=int)
+    for i in range(count):
+        game = ConnectFour([None, None])
+        for _ in range(rng.randint(0, 42)):
+            if game.is_over():
+                break
+            game.play_move(rng.choice(game.possible_moves()))
+        boards[i] = game.board
+    return boards
+
+
+def compare_batch(count):
+    """
+    Print boards per second of find_four called in a loop and of find_four_batch
+    Parameters:
+        count (int): number of boards
+    """
+    boards = random_boards(count)
+    start = time.perf_counter()
+    looped = np.array([[find_four(board, 1), find_four(board, 2)] for board in boards])
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batched = find_four_batch(boards)
+    batch_time = time.perf_counter() - start
+    if not (looped == batched).all():
+        print('  ! find_four_batch differs from find_four on %d boards' % (looped != batched).any(axis=1).sum())
+    print('%-16s %8s %9s %12s' % ('function', 'boards', 'seconds', 'boards/s'))
+    print('%-16s %8d %9.3f %12.0f' % ('find_four', count, loop_time, count / loop_time))
+    print('%-16s %8d %9.3f %12.0f %7.1fx' % ('find_four_batch', count, batch_time, count / batch_time,
+                                             loop_time / batch_time))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Negamax nodes per second on Connect Four boards')
+    parser.add_argument('--depths', type=int, nargs='+', default=[5, 6, 7])
+    parser.add_argument('--solver', action='store_true', help='compare Solver depth with Negamax in the same time')
+    parser.add_argument('--parallel', type=int, nargs='+', metavar='PROCESSES',
+                        help='compare ParallelSolver speed with the given numbers of worker processes')
+    parser.add_argument('--batch', type=int, metavar='BOARDS',
+                        help='compare find_four_batch with find_four in a loop on random boards')
+    args = parser.parse_args()
+
+    if args.solver:
+        compare_solver(args.depths)
+    elif args.parallel:
+        compare_parallel(args.depths, args.parallel)
+    elif args.batch:
+        compare_batch(args.batch)
+    else:
+        compare([ConnectFour, BitboardConnectFour], args.depths)
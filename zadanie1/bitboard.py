@@ -0,0 +1,168 @@
+# Author: Adrian Paczewski
+# Author: Kamil Kornatowski
+# game description: https://en.wikipedia.org/wiki/Connect_Four
+# bitboard reference: https://github.com/denkspuren/BitboardC4/blob/master/BitboardDesign.md
+
+# Connect Four played on two 64-bit integer bitboards instead of a 6x7 NumPy array.
+# Every column takes HEIGHT + 1 bits, the extra (sentinel) bit on top of each column is always empty,
+# so shifting a bitboard never carries a disc from one column into the next one:
+#
+#   6 13 20 27 34 41 48   <- sentinel row
+#   5 12 19 26 33 40 47
+#   4 11 18 25 32 39 46
+#   3 10 17 24 31 38 45
+#   2  9 16 23 30 37 44
+#   1  8 15 22 29 36 43
+#   0  7 14 21 28 35 42   <- bottom row
+
+# pip install easyAI
+# pip install numpy
+import numpy as np
+from easyAI import TwoPlayerGame
+
+HEIGHT = 6
+WIDTH = 7
+H1 = HEIGHT + 1  # bits per column including the sentinel bit
+
+BOTTOM_MASK = sum(1 << (col * H1) for col in range(WIDTH))  # lowest cell of every column
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)  # every playable cell
+TOP_CELLS = tuple(col * H1 + HEIGHT - 1 for col in range(WIDTH))  # bit index of the highest playable cell
+
+# shifts for vertical, horizontal, diagonal (/) and anti-diagonal (\) lines
+DIRECTIONS = (1, H1, H1 + 1, H1 - 1)
+
+
+def has_four(bitboard):
+    """
+    Check if the bitboard contains four discs in a row, column or diagonal.
+    (b & b >> s) marks discs followed by a disc in direction s, repeating the step with 2 * s
+    marks discs followed by three more.
+
+    Parameters:
+        bitboard (int): discs of one player
+    Returns:
+        Bool: True or False
+    """
+    for shift in DIRECTIONS:
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+def board_to_bitboards(board):
+    """
+    Convert ConnectFour.board into bitboards
+    Parameters:
+        board (array): 6x7 game board, row 0 is the bottom row
+    Returns:
+        list: bitboards of player 1 and player 2
+    """
+    bitboards = [0, 0]
+    for row, column in zip(*np.nonzero(board)):
+        bitboards[board[row, column] - 1] |= 1 << (int(column) * H1 + int(row))
+    return bitboards
+
+
+class BitboardConnectFour(TwoPlayerGame):
+
+    def __init__(self, players):
+        """
+        Define bitboards, column heights, players
+        Parameters:
+            players (list): List of players which will play the game
+        Returns:
+            Self object.
+        """
+        self.players = players
+        self.bitboards = [0, 0]  # discs of player 1 and player 2
+        self.heights = [col * H1 for col in range(WIDTH)]  # bit index of the next free cell in each column
+        self.current_player = 1  # player 1 starts
+
+    def possible_moves(self):
+        """
+        Returns:
+            List of possible moves.
+        """
+        heights = self.heights
+        return [col for col in range(WIDTH) if heights[col] <= TOP_CELLS[col]]  # columns which are not full
+
+    def make_move(self, column):
+        """
+        Drop the disc of the current player into the column
+        Parameters:
+            column (int): selected column
+        """
+        self.bitboards[self.current_player - 1] |= 1 << self.heights[column]
+        self.heights[column] += 1
+
+    def unmake_move(self, column):
+        """
+        Take the last disc back from the column, easyAI calls it with the same current player as make_move
+        Parameters:
+            column (int): selected column
+        """
+        self.heights[column] -= 1
+        self.bitboards[self.current_player - 1] ^= 1 << self.heights[column]
+
+    @property
+    def board(self):
+        """
+        Returns:
+            array: 6x7 board in the same layout as ConnectFour.board (row 0 is the bottom row)
+        """
+        board = np.zeros((HEIGHT, WIDTH), dtype=int)
+        for player, bitboard in enumerate(self.bitboards, start=1):
+            for col in range(WIDTH):
+                for row in range(HEIGHT):
+                    if bitboard >> (col * H1 + row) & 1:
+                        board[row, col] = player
+        return board
+
+    def show(self):
+        """
+        Print game board in console
+        """
+        board = self.board
+        print('\n' + '\n'.join(
+            ['0 1 2 3 4 5 6', 13 * '-'] +
+            [' '.join([['.', 'O', 'X'][board[5 - j][i]]
+                       for i in range(7)]) for j in range(6)]))
+
+    def win(self):
+        """
+        Check win condition
+        Returns:
+            Bool: True or False
+        """
+        return has_four(self.bitboards[self.opponent_index - 1])  # return true if four in the row
+
+    def is_over(self):
+        """
+        Check if the game is over
+        Returns:
+            Bool: True or False
+        """
+        return ((self.bitboards[0] | self.bitboards[1]) == BOARD_MASK) or self.win()  # board is full or win()
+
+    def scoring(self):
+        """
+        Define score for win and lose
+        Returns:
+            int: Score
+        """
+        return 100 if self.win() else 0  # return 100 if win and 0 if lose
+
+
+if __name__ == '__main__':
+
+    from easyAI import AI_Player, Negamax
+
+    ai = Negamax(5)
+    ai2 = Negamax(5)
+    game = BitboardConnectFour([AI_Player(ai), AI_Player(ai2)])
+    game.play()
+    if game.win():
+        print("Player %d wins." % game.opponent_index)
+    else:
+        print("It's a draw.")
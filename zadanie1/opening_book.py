@@ -0,0 +1,180 @@
+# Author: Adrian Paczewski
+# Author: Kamil Kornatowski
+
+# Opening book for the Connect Four AI.
+# The book is built offline: every position up to N plies is searched with Solver and the best move is stored.
+# Mirrored positions have mirrored best moves, so only the smaller key of a position and its mirror is stored.
+#
+# The book file is a sorted .npy array of uint64 records: key << 16 | (score + 128) << 8 | move,
+# where key = current + mask of the position (KEY_BITS bits, keys of a few late positions with both edge columns
+# full are longer, they are never in the book). The file is opened as a memory map, so loading it is instant
+# and a lookup is one binary search that touches only a few pages of the file.
+
+# usage: python opening_book.py build --plies 8 --time-budget 5 --processes 8 --output book.npy
+#        python opening_book.py probe --book book.npy 3 3 2
+
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from bitboard import H1, HEIGHT, WIDTH, has_four
+from solver import BOTTOM, TOP, Solver
+
+COLUMN_BITS = (1 << H1) - 1  # all bits of the lowest column, including the sentinel bit
+KEY_BITS = 48  # bits of the key in a book record
+
+
+def mirror(bitboard):
+    """
+    Mirror the bitboard, column 0 becomes column 6
+    Parameters:
+        bitboard (int): bitboard or position key
+    Returns:
+        int: mirrored bitboard
+    """
+    mirrored = 0
+    for col in range(WIDTH):
+        mirrored |= ((bitboard >> (col * H1)) & COLUMN_BITS) << ((WIDTH - 1 - col) * H1)
+    return mirrored
+
+
+def canonical_key(current, mask):
+    """
+    current + mask never carries from one column to the next one, so the key can be mirrored like a bitboard
+    Parameters:
+        current (int): discs of the player to move
+        mask (int): discs of both players
+    Returns:
+        tuple: smaller key of the position and its mirror, True if the mirrored key was chosen
+    """
+    key = current + mask
+    mirrored = mirror(key)
+    return (mirrored, True) if mirrored < key else (key, False)
+
+
+def positions(plies):
+    """
+    All positions with at most the given number of discs and no four in a row, one of every mirrored pair
+    Parameters:
+        plies (int): maximum number of discs
+    Returns:
+        list: (current, mask, moves) of every position
+    """
+    found, level = [], {canonical_key(0, 0)[0]: (0, 0)}
+    for moves in range(plies + 1):
+        next_level = {}
+        for current, mask in level.values():
+            found.append((current, mask, moves))
+            if moves == plies:
+                continue
+            for col in range(WIDTH):
+                if mask & TOP[col]:
+                    continue
+                new_mask = mask | (mask + BOTTOM[col])
+                if has_four(current | (new_mask ^ mask)):
+                    continue  # the game is over, the book is not needed
+                opponent = current ^ mask
+                next_level.setdefault(canonical_key(opponent, new_mask)[0], (opponent, new_mask))
+        level = next_level
+    return found
+
+
+_solver = None  # Solver of the worker process
+
+
+def _init_worker(time_budget, max_depth):
+    global _solver
+    _solver = Solver(max_depth=max_depth, time_budget=time_budget)
+
+
+def _search_position(position):
+    """
+    Returns:
+        int: book record of the position
+    """
+    current, mask, moves = position
+    move = _solver.search(current, mask, moves)
+    key, mirrored = canonical_key(current, mask)
+    if mirrored:
+        move = WIDTH - 1 - move
+    return key << 16 | (_solver.score + 128) << 8 | move
+
+
+def build(plies, time_budget, max_depth=WIDTH * HEIGHT, processes=None):
+    """
+    Search every position up to the given number of plies
+    Parameters:
+        plies (int): maximum number of discs in a book position
+        time_budget (float): seconds of search for every position
+        max_depth (int): maximum search depth for every position
+        processes (int): number of worker processes, all CPU cores by default
+    Returns:
+        array: sorted book records
+    """
+    found = [position for position in positions(plies) if not canonical_key(position[0], position[1])[0] >> KEY_BITS]
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(time_budget, max_depth)) as pool:
+        records = pool.map(_search_position, found, chunksize=16)
+    return np.sort(np.array(records, dtype=np.uint64))
+
+
+class OpeningBook:
+
+    def __init__(self, path):
+        """
+        Open the book file as a memory map
+        Parameters:
+            path (str): path to the .npy book file
+        Returns:
+            Self object.
+        """
+        self.records = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.records)
+
+    def lookup(self, current, mask):
+        """
+        Parameters:
+            current (int): discs of the player to move
+            mask (int): discs of both players
+        Returns:
+            tuple: best column and score, None if the position is not in the book
+        """
+        key, mirrored = canonical_key(current, mask)
+        if key >> KEY_BITS:
+            return None  # the key does not fit into a record
+        index = int(np.searchsorted(self.records, np.uint64(key << 16)))
+        if index == len(self.records):
+            return None
+        record = int(self.records[index])
+        if record >> 16 != key:
+            return None
+        move, score = record & 0xFF, (record >> 8 & 0xFF) - 128
+        return (WIDTH - 1 - move if mirrored else move), score
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Connect Four opening book')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='search all positions up to N plies and write the book')
+    build_parser.add_argument('--plies', type=int, default=8)
+    build_parser.add_argument('--time-budget', type=float, default=5.0, help='seconds of search per position')
+    build_parser.add_argument('--max-depth', type=int, default=WIDTH * HEIGHT)
+    build_parser.add_argument('--processes', type=int, default=None)
+    build_parser.add_argument('--output', default='book.npy')
+    probe_parser = commands.add_parser('probe', help='print the book move after the given columns')
+    probe_parser.add_argument('--book', default='book.npy')
+    probe_parser.add_argument('columns', type=int, nargs='*')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        book = build(args.plies, args.time_budget, args.max_depth, args.processes)
+        np.save(args.output, book)
+        print('%d positions written to %s (%d bytes)' % (len(book), args.output, book.nbytes))
+    else:
+        current, mask = 0, 0
+        for column in args.columns:
+            current, mask = current ^ mask, mask | (mask + BOTTOM[column])
+        print(OpeningBook(args.book).lookup(current, mask))
@@ -0,0 +1,183 @@
+# Author: Adrian Paczewski
+# Author: Kamil Kornatowski
+# root splitting reference: https://www.chessprogramming.org/Parallel_Search
+
+# Connect Four AI which searches the root moves in parallel on a process pool.
+# Every worker process keeps its own Solver (and transposition table) between tasks,
+# a task is the position after one root move in the compact (current, mask, moves) form.
+# The best root score found so far is shared between the workers, so moves searched later
+# get a narrower alpha-beta window and are pruned harder.
+
+import multiprocessing
+import os
+import time
+
+from bitboard import has_four
+from solver import BOTTOM, CELLS, COLUMN, MOVE_ORDER, TOP, WIN_SCORE, SearchTimeout, Solver, TranspositionTable, \
+    game_position
+
+_solver = None  # Solver of the worker process
+_alpha = None  # best root score of the current iteration, shared by all worker processes
+_root = None  # number of the root search the worker searched last
+
+
+def _init_worker(alpha, tt_size):
+    """
+    Create the worker Solver once per process
+    Parameters:
+        alpha (multiprocessing.Value): shared root alpha
+        tt_size (int): transposition table size of the worker
+    """
+    global _solver, _alpha
+    _solver = Solver(tt=TranspositionTable(tt_size))
+    _alpha = alpha
+
+
+def _search_move(task):
+    """
+    Search the position after one root move with the current shared alpha
+    Parameters:
+        task (tuple): column, position after the move (current, mask, moves), depth, seconds left, can_stop
+                      and the number of the root search
+    Returns:
+        tuple: column, score (None on timeout) and True if the score is exact (not only an upper bound)
+    """
+    global _root
+    column, current, mask, moves, depth, seconds, can_stop, root = task
+    if root != _root:  # first task of a new root search, entries of the older searches are replaced first
+        _root = root
+        _solver.tt.generation += 1
+    _solver.deadline = time.perf_counter() + seconds
+    _solver.depth = 1 if can_stop else 0  # Solver.negamax checks the deadline only after the first iteration
+    alpha = _alpha.value
+    try:
+        score = -_solver.negamax(current, mask, moves, depth, -WIN_SCORE, -alpha)
+    except SearchTimeout:
+        return column, None, False
+    with _alpha.get_lock():
+        if score > _alpha.value:
+            _alpha.value = score
+    return column, score, score > alpha
+
+
+class ParallelSolver:
+    """
+    AI algorithm for easyAI AI_Player, usable in place of Negamax or Solver:
+        >>> with ParallelSolver(processes=4, time_budget=2) as ai:
+        ...     ConnectFour([Human_Player(), AI_Player(ai)]).play()
+    """
+
+    def __init__(self, processes=None, max_depth=CELLS, time_budget=1.0, tt_size=1000003, book=None):
+        """
+        Parameters:
+            processes (int): number of worker processes, all CPU cores by default
+            max_depth (int): deepest iteration of the iterative deepening
+            time_budget (float): seconds available for one move
+            tt_size (int): transposition table size of every worker
+            book (OpeningBook): positions with a precomputed best move, searched positions if not given
+        Returns:
+            Self object.
+        """
+        self.processes = processes or os.cpu_count()
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.tt_size = tt_size
+        self.book = book
+        self.depth = 0  # depth of the last completed iteration
+        self.score = 0  # score of the last completed iteration
+        self._alpha = None
+        self._pool = None
+        self._root = 0  # number of the root search, the workers start a new transposition table generation
+
+    def __call__(self, game):
+        """
+        Returns:
+            int: the best column for the player to move in the given game
+        """
+        return self.search(*game_position(game))
+
+    def __deepcopy__(self, memo):
+        # TwoPlayerGame.play deepcopies the game and its players on every move, the pool cannot be copied
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Stop the worker processes
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def start(self):
+        """
+        Start the worker processes, called by the first search if not called before
+        """
+        if self._pool is None:
+            self._alpha = multiprocessing.Value('i', -WIN_SCORE)
+            self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                              initargs=(self._alpha, self.tt_size))
+
+    def search(self, current, mask, moves):
+        """
+        Iterative deepening with the root moves of every iteration split between the worker processes
+        Parameters:
+            current (int): discs of the player to move
+            mask (int): discs of both players
+            moves (int): number of moves made
+        Returns:
+            int: the best column
+        """
+        self.depth, self.score = 0, 0
+        if self.book is not None:
+            entry = self.book.lookup(current, mask)
+            if entry is not None:  # book move, no search (depth stays 0)
+                self.score = entry[1]
+                return entry[0]
+        self.start()
+        self._root += 1
+        deadline = time.perf_counter() + self.time_budget
+        playable = [col for col in MOVE_ORDER if not mask & TOP[col]]
+        for col in playable:  # play an immediate win without searching
+            if has_four(current | ((mask + BOTTOM[col]) & COLUMN[col])):
+                self.depth, self.score = 1, WIN_SCORE - moves - 1
+                return col
+
+        best_move = playable[0]
+        for depth in range(1, min(self.max_depth, CELLS - moves) + 1):
+            self._alpha.value = -WIN_SCORE
+            seconds = deadline - time.perf_counter()
+            tasks = [(col, current ^ mask, mask | (mask + BOTTOM[col]), moves + 1, depth - 1, seconds, depth > 1,
+                      self._root) for col in playable]
+            results = self._pool.map(_search_move, tasks, chunksize=1)
+            if any(score is None for _, score, _ in results):
+                break  # the iteration did not finish in time, keep the result of the previous one
+            # the best score, an exact score wins a tie with an upper bound of a pruned move
+            column, score, _ = max(results, key=lambda result: (result[1], result[2]))
+            best_move, self.depth, self.score = column, depth, score
+            playable.remove(column)
+            playable.insert(0, column)  # the best move goes first in the next iteration
+            if score != 0:  # a win or a loss is proven
+                break
+        return best_move
+
+
+if __name__ == '__main__':
+
+    from easyAI import AI_Player
+
+    from ConnectFour import ConnectFour
+
+    with ParallelSolver(time_budget=1.0) as ai, ParallelSolver(time_budget=1.0) as ai2:
+        game = ConnectFour([AI_Player(ai), AI_Player(ai2)])
+        game.play()
+    if game.win():
+        print("Player %d wins." % game.opponent_index)
+    else:
+        print("It's a draw.")
@@ -0,0 +1,265 @@
+# Author: Adrian Paczewski
+# Author: Kamil Kornatowski
+# solver reference: http://blog.gamesolver.org/solving-connect-four/01-introduction/
+# transposition table reference: https://www.chessprogramming.org/Transposition_Table
+
+# Connect Four AI with alpha-beta search on bitboards, a bounded transposition table,
+# center-first move ordering and iterative deepening within a time budget per move.
+#
+# A position is stored as (current, mask): discs of the player to move and discs of both players.
+# current + mask is unique for every position, so it is used as the transposition table key.
+
+import time
+
+from bitboard import H1, HEIGHT, WIDTH, board_to_bitboards, has_four
+
+CELLS = WIDTH * HEIGHT
+WIN_SCORE = CELLS + 1  # winning with the disc number n scores WIN_SCORE - n, sooner wins score higher
+MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)  # center columns first, they take part in the most lines
+
+BOTTOM = tuple(1 << (col * H1) for col in range(WIDTH))  # lowest cell of each column
+TOP = tuple(1 << (col * H1 + HEIGHT - 1) for col in range(WIDTH))  # highest playable cell of each column
+COLUMN = tuple(((1 << HEIGHT) - 1) << (col * H1) for col in range(WIDTH))  # all playable cells of each column
+
+# transposition table entry flags
+EXACT, LOWERBOUND, UPPERBOUND = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget of a move is used up
+    """
+
+
+class TranspositionTable:
+
+    def __init__(self, size=1000003):
+        """
+        Fixed size table of searched positions, a slot is chosen by key % size
+        Parameters:
+            size (int): number of slots, a prime number spreads the keys best
+        Returns:
+            Self object.
+        """
+        self.size = size
+        self.entries = [None] * size
+        self.generation = 0  # increased on every new root search, older entries are replaced first
+
+    def lookup(self, key):
+        """
+        Parameters:
+            key (int): position key
+        Returns:
+            tuple: (key, depth, flag, value, move, generation) or None if the position is not stored
+        """
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        """
+        Store the search result, replace the slot only if it is empty, left from an older search
+        or searched less deep than the new result (depth-preferred replacement)
+        Parameters:
+            key (int): position key
+            depth (int): searched depth
+            flag (int): EXACT, LOWERBOUND or UPPERBOUND
+            value (int): score of the position
+            move (int): best column
+        """
+        index = key % self.size
+        entry = self.entries[index]
+        if entry is None or entry[5] != self.generation or entry[1] <= depth or entry[0] == key:
+            self.entries[index] = (key, depth, flag, value, move, self.generation)
+
+    def clear(self):
+        """
+        Remove all stored positions
+        """
+        self.entries = [None] * self.size
+
+
+def game_position(game):
+    """
+    Read the position of the player to move from a ConnectFour or BitboardConnectFour game
+    Parameters:
+        game (TwoPlayerGame): game
+    Returns:
+        tuple: current, mask and number of moves made
+    """
+    bitboards = game.bitboards if hasattr(game, 'bitboards') else board_to_bitboards(game.board)
+    current = bitboards[game.current_player - 1]
+    mask = bitboards[0] | bitboards[1]
+    return current, mask, bin(mask).count('1')
+
+
+class Solver:
+    """
+    AI algorithm for easyAI AI_Player, usable in place of Negamax:
+        >>> game = ConnectFour([Human_Player(), AI_Player(Solver(time_budget=2))])
+    """
+
+    def __init__(self, max_depth=CELLS, time_budget=1.0, tt=None, book=None):
+        """
+        Parameters:
+            max_depth (int): deepest iteration of the iterative deepening
+            time_budget (float): seconds available for one move
+            tt (TranspositionTable): table shared between moves, a new one is created if not given
+            book (OpeningBook): positions with a precomputed best move, searched positions if not given
+        Returns:
+            Self object.
+        """
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.tt = TranspositionTable() if tt is None else tt
+        self.book = book
+        self.nodes = 0
+        self.depth = 0  # depth of the last completed iteration
+        self.score = 0  # score of the last completed iteration
+        self.deadline = None
+
+    def __call__(self, game):
+        """
+        Returns:
+            int: the best column for the player to move in the given game
+        """
+        return self.search(*game_position(game))
+
+    def __deepcopy__(self, memo):
+        # TwoPlayerGame.play deepcopies the game and its players on every move, the table is shared instead
+        return self
+
+    def search(self, current, mask, moves):
+        """
+        Iterative deepening: search 1, 2, 3... plies deep until the time budget or max_depth is reached,
+        or the game result is proven. Every iteration reuses the table filled by the previous ones.
+        Parameters:
+            current (int): discs of the player to move
+            mask (int): discs of both players
+            moves (int): number of moves made
+        Returns:
+            int: the best column
+        """
+        self.tt.generation += 1
+        self.nodes, self.depth, self.score = 0, 0, 0
+        if self.book is not None:
+            entry = self.book.lookup(current, mask)
+            if entry is not None:  # book move, no search (depth stays 0)
+                self.score = entry[1]
+                return entry[0]
+        self.deadline = time.perf_counter() + self.time_budget
+        playable = [col for col in MOVE_ORDER if not mask & TOP[col]]
+        for col in playable:  # play an immediate win without searching
+            if has_four(current | ((mask + BOTTOM[col]) & COLUMN[col])):
+                self.depth, self.score = 1, WIN_SCORE - moves - 1
+                return col
+
+        best_move = playable[0]
+        for depth in range(1, min(self.max_depth, CELLS - moves) + 1):
+            try:
+                score, move = self.root(current, mask, moves, depth)
+            except SearchTimeout:
+                break
+            best_move, self.depth, self.score = move, depth, score
+            if score != 0:  # a win or a loss is proven, deeper search would not change it
+                break
+        return best_move
+
+    def root(self, current, mask, moves, depth):
+        """
+        Search all moves of the root position, the best move of the previous iteration goes first
+        Returns:
+            tuple: score and best column
+        """
+        entry = self.tt.lookup(current + mask)
+        order = [col for col in MOVE_ORDER if not mask & TOP[col]]
+        if entry is not None:
+            order.remove(entry[4])
+            order.insert(0, entry[4])
+        alpha, beta = -WIN_SCORE, WIN_SCORE
+        best_move = order[0]
+        for col in order:
+            new_mask = mask | (mask + BOTTOM[col])
+            score = -self.negamax(current ^ mask, new_mask, moves + 1, depth - 1, -beta, -alpha)
+            if score > alpha:
+                alpha, best_move = score, col
+        self.tt.store(current + mask, depth, EXACT, alpha, best_move)
+        return alpha, best_move
+
+    def negamax(self, current, mask, moves, depth, alpha, beta):
+        """
+        Alpha-beta search from the point of view of the player to move
+        Parameters:
+            current (int): discs of the player to move
+            mask (int): discs of both players
+            moves (int): number of moves made
+            depth (int): plies left to search
+            alpha (int): lower bound of the score
+            beta (int): upper bound of the score
+        Returns:
+            int: score, positive if the player to move wins, 0 for a draw or an unknown result
+        """
+        self.nodes += 1
+        if not self.nodes & 1023 and self.depth and time.perf_counter() > self.deadline:
+            raise SearchTimeout()  # the first iteration always completes
+        if moves == CELLS:
+            return 0  # draw
+
+        playable = [col for col in MOVE_ORDER if not mask & TOP[col]]
+        for col in playable:
+            if has_four(current | ((mask + BOTTOM[col]) & COLUMN[col])):
+                return WIN_SCORE - moves - 1
+        if depth == 0:
+            return 0
+
+        key = current + mask
+        alpha_orig = alpha
+        entry = self.tt.lookup(key)
+        if entry is not None:
+            if entry[1] >= depth:
+                flag, value = entry[2], entry[3]
+                if flag == EXACT:
+                    return value
+                if flag == LOWERBOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+            playable.remove(entry[4])
+            playable.insert(0, entry[4])  # the stored best move goes first
+
+        best_value, best_move = -WIN_SCORE, playable[0]
+        opponent = current ^ mask
+        for col in playable:
+            value = -self.negamax(opponent, mask | (mask + BOTTOM[col]), moves + 1, depth - 1, -beta, -alpha)
+            if value > best_value:
+                best_value, best_move = value, col
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= alpha_orig:
+            flag = UPPERBOUND
+        elif best_value >= beta:
+            flag = LOWERBOUND
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, best_value, best_move)
+        return best_value
+
+
+if __name__ == '__main__':
+
+    from easyAI import AI_Player
+
+    from ConnectFour import ConnectFour
+
+    game = ConnectFour([AI_Player(Solver(time_budget=1.0)), AI_Player(Solver(time_budget=1.0))])
+    game.play()
+    if game.win():
+        print("Player %d wins." % game.opponent_index)
+    else:
+        print("It's a draw.")
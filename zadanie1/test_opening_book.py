@@ -0,0 +1,32 @@
+# Author: Adrian Paczewski
+# Author: Kamil Kornatowski
+
+# usage: python -m pytest test_opening_book.py
+
+import numpy as np
+
+from opening_book import KEY_BITS, OpeningBook, build, canonical_key
+from solver import BOTTOM, Solver
+
+# both edge columns are full and the player to move owns both top discs, the key is longer than KEY_BITS
+LONG_KEY_MOVES = [6, 6, 6, 0, 4, 6, 0, 6, 6, 4, 0, 5, 3, 0, 2, 4, 2, 1, 4, 0, 2, 4, 1, 1, 5, 0]
+
+
+def play(columns):
+    current, mask = 0, 0
+    for column in columns:
+        current, mask = current ^ mask, mask | (mask + BOTTOM[column])
+    return current, mask
+
+
+def test_lookup_of_a_key_longer_than_a_record(tmp_path):
+    path = str(tmp_path / 'book.npy')
+    np.save(path, build(1, 0.01, 2, 1))
+    book = OpeningBook(path)
+    current, mask = play(LONG_KEY_MOVES)
+    assert canonical_key(current, mask)[0] >> KEY_BITS
+    assert book.lookup(current, mask) is None
+    assert book.lookup(0, 0) is not None
+
+    solver = Solver(time_budget=0.1, book=book)
+    assert solver.search(current, mask, len(LONG_KEY_MOVES)) in range(7)
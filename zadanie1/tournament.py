@@ -0,0 +1,185 @@
+# Author: Adrian Paczewski
+# Author: Kamil Kornatowski
+
+# Headless Connect Four tournament between AI agents, played on a process pool.
+# Every pair of agents plays the given number of games, the agents change sides after every game
+# and the first plies are random (seeded by the game number) so deterministic agents do not replay one game.
+#
+# Agents are given as specifications:
+#   negamax:5            easyAI Negamax(5)
+#   solver:0.5           Solver with 0.5 s per move
+#   solver:0.5:book.npy  Solver with 0.5 s per move and an opening book
+#   random               random legal move
+# (ParallelSolver cannot be an agent, the pool worker processes are not allowed to start their own workers)
+#
+# Every finished game is written at once as one line of the record file:
+#   game;first agent;second agent;winner (0 for a draw, 1 or 2);columns of all moves, e.g. 3342
+#
+# usage: python tournament.py --agents negamax:5 solver:0.2 --games 100 --processes 8 --output games.csv
+
+import argparse
+import multiprocessing
+import random
+import time
+from itertools import combinations
+
+import numpy as np
+from easyAI import AI_Player, Negamax
+
+from ConnectFour import ConnectFour
+from bitboard import BitboardConnectFour
+from opening_book import OpeningBook
+from solver import Solver
+
+GAMES = {'connectfour': ConnectFour, 'bitboard': BitboardConnectFour}
+
+_agents = {}  # agents of the worker process, reused between games so Solver keeps its transposition table
+
+
+class RandomAgent:
+
+    def __init__(self, seed=None):
+        """
+        Parameters:
+            seed (int): random seed
+        Returns:
+            Self object.
+        """
+        self.rng = random.Random(seed)
+
+    def __call__(self, game):
+        """
+        Returns:
+            int: random column from the possible moves
+        """
+        return self.rng.choice(game.possible_moves())
+
+
+def make_agent(spec):
+    """
+    Create the AI algorithm described by the specification
+    Parameters:
+        spec (str): agent specification, e.g. 'negamax:5'
+    Returns:
+        callable: AI algorithm which returns a move for the given game
+    """
+    name, *options = spec.split(':')
+    if name == 'negamax':
+        return Negamax(int(options[0]))
+    if name == 'solver':
+        book = OpeningBook(options[1]) if len(options) > 1 else None
+        return Solver(time_budget=float(options[0]), book=book)
+    if name == 'random':
+        return RandomAgent()
+    raise ValueError('Unknown agent ' + spec)
+
+
+def play_game(task):
+    """
+    Play one game without printing the board
+    Parameters:
+        task (tuple): game number, game class name, first agent, second agent, number of random opening plies
+    Returns:
+        tuple: game number, agents, winner, moves and per-move latencies (seconds) of both agents
+    """
+    number, game_name, first, second, random_plies = task
+    for spec in (first, second):
+        if spec not in _agents:
+            _agents[spec] = make_agent(spec)
+    game = GAMES[game_name]([AI_Player(_agents[first]), AI_Player(_agents[second])])
+    rng = random.Random(number)
+    moves, latencies = [], ([], [])
+    while not game.is_over():
+        if len(moves) < random_plies:
+            move = rng.choice(game.possible_moves())
+        else:
+            start = time.perf_counter()
+            move = game.player.ask_move(game)
+            latencies[game.current_player - 1].append(time.perf_counter() - start)
+        moves.append(move)
+        game.play_move(move)
+    winner = game.opponent_index if game.win() else 0
+    return number, first, second, winner, moves, latencies
+
+
+def tasks(agents, games, game_name, random_plies):
+    """
+    Every pair of agents plays the given number of games, changing sides after every game
+    Returns:
+        list: play_game tasks
+    """
+    found = []
+    for a, b in combinations(agents, 2):
+        for i in range(games):
+            first, second = (a, b) if i % 2 == 0 else (b, a)
+            found.append((len(found), game_name, first, second, random_plies))
+    return found
+
+
+def report(results, agents):
+    """
+    Print win/draw rates, average game length and move latency percentiles
+    Parameters:
+        results (list): play_game results
+        agents (list): agent specifications
+    """
+    print('\n%-24s %-24s %6s %7s %7s %7s %8s' % ('agent', 'opponent', 'games', 'wins', 'draws', 'losses',
+                                                  'length'))
+    for a, b in combinations(agents, 2):
+        for agent, opponent in ((a, b), (b, a)):
+            games = [r for r in results if {r[1], r[2]} == {agent, opponent}]
+            if not games:
+                continue
+            wins = sum(1 for r in games if r[3] and r[r[3]] == agent)
+            draws = sum(1 for r in games if r[3] == 0)
+            length = np.mean([len(r[4]) for r in games])
+            print('%-24s %-24s %6d %6.1f%% %6.1f%% %6.1f%% %8.1f' % (
+                agent, opponent, len(games), 100 * wins / len(games), 100 * draws / len(games),
+                100 * (len(games) - wins - draws) / len(games), length))
+
+    print('\n%-24s %8s %10s %10s %10s %10s' % ('agent', 'moves', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms'))
+    for agent in agents:
+        latencies = [t for r in results for side in (0, 1) if r[1 + side] == agent for t in r[5][side]]
+        if latencies:
+            p50, p90, p99, p100 = 1000 * np.percentile(latencies, [50, 90, 99, 100])
+            print('%-24s %8d %10.2f %10.2f %10.2f %10.2f' % (agent, len(latencies), p50, p90, p99, p100))
+
+
+def run(agents, games, processes=None, output='games.csv', game_name='bitboard', random_plies=2):
+    """
+    Play the tournament and stream the game records into the output file
+    Parameters:
+        agents (list): agent specifications
+        games (int): games of every pair of agents
+        processes (int): number of worker processes, all CPU cores by default
+        output (str): path of the record file
+        game_name (str): 'connectfour' or 'bitboard'
+        random_plies (int): number of random moves at the start of every game
+    Returns:
+        list: play_game results
+    """
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool, open(output, 'w', encoding='UTF-8') as records:
+        for result in pool.imap_unordered(play_game, tasks(agents, games, game_name, random_plies)):
+            number, first, second, winner, moves, _ = result
+            records.write('%d;%s;%s;%d;%s\n' % (number, first, second, winner, ''.join(map(str, moves))))
+            results.append(result)
+    elapsed = time.perf_counter() - start
+    print('%d games in %.1f s (%.1f games/s)' % (len(results), elapsed, len(results) / elapsed))
+    report(results, agents)
+    return results
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Headless Connect Four tournament')
+    parser.add_argument('--agents', nargs='+', default=['negamax:5', 'solver:0.1'])
+    parser.add_argument('--games', type=int, default=100, help='games of every pair of agents')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', default='games.csv')
+    parser.add_argument('--game', choices=sorted(GAMES), default='bitboard')
+    parser.add_argument('--random-plies', type=int, default=2)
+    args = parser.parse_args()
+
+    run(args.agents, args.games, args.processes, args.output, args.game, args.random_plies)
@@ -23,7 +23,6 @@ Cechy, o które się opieramy:
    - Stopień skomunikowania potrafi podnieść cenę mniej atrakcyjnej nieruchomości, lecz od pewnego etapu duża
    powierzchnia narzuca rosnącą cenę.
 """
-import matplotlib.pyplot as plt
 import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
@@ -162,11 +161,15 @@ rule7 = ctrl.Rule(antecedent=(
     consequent=value['highest'])
 value_ctrl = ctrl.ControlSystem([rule1, rule2, rule3, rule4, rule5, rule6, rule7])
 valuation = ctrl.ControlSystemSimulation(value_ctrl)
-valuation.input['area'] = 105
-valuation.input['number of rooms'] = 4
-valuation.input['communication'] = 3
-valuation.compute()
-result = "Szacowana wartość nieruchomości: {:,.2f} PLN".format(valuation.output['value'])
-print(result)
-value.view(sim=valuation)
-plt.show()
\ No newline at end of file
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    valuation.input['area'] = 105
+    valuation.input['number of rooms'] = 4
+    valuation.input['communication'] = 3
+    valuation.compute()
+    result = "Szacowana wartość nieruchomości: {:,.2f} PLN".format(valuation.output['value'])
+    print(result)
+    value.view(sim=valuation)
+    plt.show()
@@ -0,0 +1,210 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+"""
+Wsadowa wycena nieruchomości
+-------------------
+Wycena całego portfela nieruchomości bez wywoływania valuation.compute() dla każdej z osobna.
+Wszystkie kroki wnioskowania Mamdaniego z Zadanie2.py są wykonywane jako operacje na tablicach NumPy
+dla wszystkich nieruchomości naraz:
+* rozmycie wejść - interpolacja funkcji przynależności (jak interp_membership w skfuzzy),
+* siła odpalenia reguł - drzewo AND/OR każdej reguły liczone przez np.fmin / np.fmax,
+* defuzyfikacja centroidem - tak jak w skfuzzy uniwersum wyjścia jest uzupełniane o punkty przecięcia
+  funkcji przynależności z poziomem odcięcia, a środek ciężkości liczony jest dokładnie dla funkcji
+  odcinkami liniowej.
+Wyniki są takie same (z dokładnością do zaokrągleń) jak dla valuation.compute().
+
+Użycie:
+    python batch.py --input listings.csv --output values.csv
+    python batch.py --benchmark 1000
+Plik CSV ma nagłówek i kolumny area,rooms,communication.
+"""
+import argparse
+import time
+
+import numpy as np
+from skfuzzy.control.term import Term
+
+from Zadanie2 import area, communication, number_of_rooms, valuation, value, value_ctrl
+from rule_table import table_cuts
+
+INPUTS = (area, number_of_rooms, communication)
+
+
+def memberships(areas, rooms, communications):
+    """
+    Rozmycie wejść, wartości spoza uniwersum są przycinane do jego granic jak w ControlSystemSimulation
+        Parameters:
+            areas (array): powierzchnie
+            rooms (array): liczby pokoi
+            communications (array): skomunikowanie
+        Return:
+            memberships (dict): przynależność do każdego termu, klucz (nazwa zmiennej, nazwa termu)
+    """
+    result = {}
+    for variable, x in zip(INPUTS, (areas, rooms, communications)):
+        x = np.clip(np.asarray(x, dtype=float), variable.universe.min(), variable.universe.max())
+        for label, term in variable.terms.items():
+            result[(variable.label, label)] = np.interp(x, variable.universe, term.mf)
+    return result
+
+
+def firing(antecedent, membership):
+    """
+    Siła odpalenia poprzednika reguły, liczona rekurencyjnie po drzewie AND/OR/NOT
+        Parameters:
+            antecedent (TermPrimitive): poprzednik reguły
+            membership (dict): wynik funkcji memberships
+        Return:
+            firing (array): siła odpalenia dla każdej nieruchomości
+    """
+    if isinstance(antecedent, Term):
+        return membership[(antecedent.parent.label, antecedent.label)]
+    if antecedent.kind == 'not':
+        return 1. - firing(antecedent.term1, membership)
+    function = np.fmin if antecedent.kind == 'and' else np.fmax
+    return function(firing(antecedent.term1, membership), firing(antecedent.term2, membership))
+
+
+def consequent_cuts(membership, rules=value_ctrl.rules):
+    """
+    Poziom odcięcia każdego termu wyjścia, kilka reguł z tym samym termem łączy np.fmax
+        Parameters:
+            membership (dict): wynik funkcji memberships
+            rules (iterable): reguły układu sterowania
+        Return:
+            cuts (array): kształt (liczba nieruchomości, liczba termów value)
+    """
+    labels = list(value.terms)
+    cuts = [None] * len(labels)
+    for rule in rules:
+        strength = firing(rule.antecedent, membership)
+        for consequent in rule.consequent:
+            i = labels.index(consequent.term.label)
+            activation = strength * consequent.weight
+            cuts[i] = activation if cuts[i] is None else np.fmax(cuts[i], activation)
+    size = len(next(iter(membership.values())))
+    return np.column_stack([np.zeros(size) if cut is None else cut for cut in cuts])
+
+
+def centroid(cuts, universe=value.universe, term_mfs=None):
+    """
+    Defuzyfikacja centroidem jak CrispValueCalculator.defuzz w skfuzzy, dla wielu nieruchomości naraz
+        Parameters:
+            cuts (array): poziomy odcięcia termów, kształt (n, liczba termów)
+            universe (array): uniwersum wyjścia
+            term_mfs (array): funkcje przynależności termów wyjścia, kształt (liczba termów, len(universe))
+        Return:
+            values (array): wartości nieruchomości
+    """
+    if term_mfs is None:
+        term_mfs = np.array([term.mf for term in value.terms.values()])
+    universe = np.asarray(universe, dtype=float)
+    x1, x2 = universe[:-1], universe[1:]
+    y1, y2 = term_mfs[:, :-1], term_mfs[:, 1:]
+    cut = cuts[:, :, None]
+
+    # punkty, w których funkcja termu przecina poziom odcięcia (_interp_universe_fast w skfuzzy),
+    # odcinki bez przecięcia dają punkt x1, który już jest w uniwersum i nie zmienia wyniku
+    crossing = np.where(cut == 0, (y1 > 0) != (y2 > 0), (y1 >= cut) != (y2 >= cut))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        points = np.where(crossing, x1 + (cut - y1) * (x2 - x1) / (y2 - y1), x1)
+    xs = np.sort(np.concatenate([np.broadcast_to(universe, (len(cuts), len(universe))),
+                                 points.reshape(len(cuts), -1)], axis=1), axis=1)
+
+    mf = np.zeros_like(xs)
+    for i, term_mf in enumerate(term_mfs):
+        np.maximum(mf, np.minimum(cuts[:, i, None], np.interp(xs, universe, term_mf)), out=mf)
+
+    # środek ciężkości funkcji odcinkami liniowej, każdy odcinek to trapez
+    dx = np.diff(xs, axis=1)
+    ya, yb = mf[:, :-1], mf[:, 1:]
+    area_sum = (0.5 * dx * (ya + yb)).sum(axis=1)
+    moment_sum = (dx * dx / 3. * (yb + 0.5 * ya) + xs[:, :-1] * 0.5 * dx * (ya + yb)).sum(axis=1)
+    return moment_sum / np.fmax(area_sum, np.finfo(float).eps)
+
+
+def value_batch(areas, rooms, communications, chunk_size=4096, rule_table=None):
+    """
+    Wycena wielu nieruchomości naraz, dane dzielone są na części by ograniczyć zużycie pamięci
+        Parameters:
+            areas (array): powierzchnie
+            rooms (array): liczby pokoi
+            communications (array): skomunikowanie
+            chunk_size (int): liczba nieruchomości liczonych w jednym kroku
+            rule_table (array): tablica reguł z rule_table.py, domyślnie reguły skfuzzy z Zadanie2.py
+        Return:
+            values (array): wartości nieruchomości
+    """
+    areas, rooms, communications = np.broadcast_arrays(np.asarray(areas, dtype=float), np.asarray(rooms, dtype=float),
+                                                       np.asarray(communications, dtype=float))
+    result = np.empty(areas.shape)
+    flat = result.reshape(-1)
+    for start in range(0, areas.size, chunk_size):
+        part = slice(start, start + chunk_size)
+        membership = memberships(areas.reshape(-1)[part], rooms.reshape(-1)[part], communications.reshape(-1)[part])
+        cuts = consequent_cuts(membership) if rule_table is None else table_cuts(membership, rule_table)
+        flat[part] = centroid(cuts)
+    return result
+
+
+def value_csv(path, output=None):
+    """
+    Wycena nieruchomości z pliku CSV z nagłówkiem i kolumnami area,rooms,communication
+        Parameters:
+            path (str): ścieżka do pliku CSV
+            output (str): ścieżka do pliku wynikowego, kolumna value jest dopisywana do danych wejściowych
+        Return:
+            values (array): wartości nieruchomości
+    """
+    data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+    values = value_batch(data[:, 0], data[:, 1], data[:, 2])
+    if output is not None:
+        np.savetxt(output, np.column_stack([data, values]), delimiter=',', fmt='%g,%g,%g,%.2f',
+                   header='area,rooms,communication,value', comments='')
+    return values
+
+
+def benchmark(count, seed=0):
+    """
+    Porównuje czas i wyniki value_batch z valuation.compute() wywoływanym w pętli
+        Parameters:
+            count (int): liczba losowych nieruchomości
+            seed (int): ziarno generatora losowego
+    """
+    rng = np.random.default_rng(seed)
+    areas, rooms, communications = rng.uniform(20, 120, count), rng.uniform(1, 5, count), rng.uniform(1, 3, count)
+    start = time.perf_counter()
+    exact = []
+    for a, r, c in zip(areas, rooms, communications):
+        valuation.input['area'] = a
+        valuation.input['number of rooms'] = r
+        valuation.input['communication'] = c
+        valuation.compute()
+        exact.append(valuation.output['value'])
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    values = value_batch(areas, rooms, communications)
+    batch_time = time.perf_counter() - start
+    print('valuation.compute() w pętli: {} nieruchomości, {:.3f} s ({:,.0f}/s)'.format(count, loop_time,
+                                                                                        count / loop_time))
+    print('value_batch: {} nieruchomości, {:.3f} s ({:,.0f}/s), {:.0f}x szybciej'.format(
+        count, batch_time, count / batch_time, loop_time / batch_time))
+    print('Największa różnica: {:.6f} PLN'.format(np.abs(values - np.array(exact)).max()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Wsadowa wycena nieruchomości')
+    parser.add_argument('--input', help='plik CSV z kolumnami area,rooms,communication')
+    parser.add_argument('--output', help='plik CSV z dopisaną kolumną value')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='porównanie z valuation.compute() na N nieruchomościach')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+    elif args.input:
+        values = value_csv(args.input, args.output)
+        if args.output is None:
+            for v in values:
+                print('{:,.2f}'.format(v))
+    else:
+        parser.print_help()
@@ -0,0 +1,165 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+"""
+Tablica reguł
+-------------------
+Reguły rule1 ... rule7 z Zadanie2.py wyliczają każdą kombinację termów (area, number of rooms, communication)
+jako długie OR złożone z AND. Ta sama baza reguł zapisana jest tutaj jako gęsty tensor logiczny o kształcie
+5 x 5 x 3 x 7: table[a, r, c, k] jest True, gdy trójka termów (a, r, c) prowadzi do k-tego termu value.
+Jedna trójka może prowadzić do kilku termów (np. mediocre & 5 & bad występuje w rule2 i w rule3),
+dlatego tensor ma osobną oś dla termów wyjścia zamiast jednego indeksu.
+
+Wnioskowanie to wtedy iloczyn zewnętrzny (np.fmin) wektorów przynależności, a poziom odcięcia termu
+wyjścia to maksimum po trójkach, które do niego prowadzą - dokładnie to samo co OR z AND w skfuzzy.
+
+Tablicę można wczytać z pliku CSV (rules.csv), co pozwala zmienić bazę reguł bez budowania
+nowego ControlSystem:
+    area,number of rooms,communication,value
+    poor,1,bad,lowest
+
+Użycie:
+    python rule_table.py --export rules.csv
+    python rule_table.py --rules rules.csv --benchmark 10000
+"""
+import argparse
+import csv
+import time
+
+import numpy as np
+from skfuzzy.control.term import Term
+
+from Zadanie2 import area, communication, number_of_rooms, value, value_ctrl
+
+INPUTS = (area, number_of_rooms, communication)
+HEADER = [variable.label for variable in INPUTS] + [value.label]
+
+
+def conjunctions(antecedent):
+    """
+    Rozpisuje poprzednik reguły na listę koniunkcji termów (OR złożone z AND)
+        Parameters:
+            antecedent (TermPrimitive): poprzednik reguły
+        Return:
+            conjunctions (list): lista list termów
+    """
+    if isinstance(antecedent, Term):
+        return [[antecedent]]
+    if antecedent.kind == 'or':
+        return conjunctions(antecedent.term1) + conjunctions(antecedent.term2)
+    if antecedent.kind == 'and':
+        return [left + right for left in conjunctions(antecedent.term1) for right in conjunctions(antecedent.term2)]
+    raise ValueError('Tablica reguł nie obsługuje NOT: ' + str(antecedent))
+
+
+def empty_table():
+    """
+    Return:
+        table (array): tensor logiczny bez żadnej reguły
+    """
+    return np.zeros([len(variable.terms) for variable in INPUTS] + [len(value.terms)], dtype=bool)
+
+
+def table_from_rules(rules):
+    """
+    Buduje tablicę reguł z reguł skfuzzy, każda koniunkcja musi zawierać jeden term każdego wejścia
+        Parameters:
+            rules (iterable): reguły układu sterowania
+        Return:
+            table (array): tensor logiczny 5 x 5 x 3 x 7
+    """
+    table = empty_table()
+    labels = [list(variable.terms) for variable in INPUTS]
+    outputs = list(value.terms)
+    for rule in rules:
+        for conjunction in conjunctions(rule.antecedent):
+            terms = {term.parent.label: term.label for term in conjunction}
+            index = tuple(labels[i].index(terms[variable.label]) for i, variable in enumerate(INPUTS))
+            for consequent in rule.consequent:
+                table[index + (outputs.index(consequent.term.label),)] = True
+    return table
+
+
+def load_table(path):
+    """
+    Wczytuje tablicę reguł z pliku CSV, jeden wiersz to jedna trójka termów i jeden term wyjścia
+        Parameters:
+            path (str): ścieżka do pliku CSV
+        Return:
+            table (array): tensor logiczny 5 x 5 x 3 x 7
+    """
+    table = empty_table()
+    labels = [list(variable.terms) for variable in INPUTS] + [list(value.terms)]
+    with open(path, 'r', encoding="UTF-8", newline='') as f:
+        for row in csv.DictReader(f):
+            table[tuple(terms.index(row[name]) for terms, name in zip(labels, HEADER))] = True
+    return table
+
+
+def save_table(table, path):
+    """
+    Zapisuje tablicę reguł do pliku CSV w formacie czytanym przez load_table
+        Parameters:
+            table (array): tensor logiczny 5 x 5 x 3 x 7
+            path (str): ścieżka do pliku CSV
+    """
+    labels = [list(variable.terms) for variable in INPUTS] + [list(value.terms)]
+    with open(path, 'w', encoding="UTF-8", newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for index in zip(*np.nonzero(table)):
+            writer.writerow([terms[i] for terms, i in zip(labels, index)])
+
+
+def table_cuts(membership, table):
+    """
+    Poziom odcięcia każdego termu wyjścia z tablicy reguł
+        Parameters:
+            membership (dict): przynależności z batch.memberships, klucz (nazwa zmiennej, nazwa termu)
+            table (array): tensor logiczny 5 x 5 x 3 x 7
+        Return:
+            cuts (array): kształt (liczba nieruchomości, liczba termów value)
+    """
+    a, r, c = [np.array([membership[(variable.label, label)] for label in variable.terms]) for variable in INPUTS]
+    # siła odpalenia każdej trójki termów: iloczyn zewnętrzny wektorów przynależności z np.fmin jako AND,
+    # nieruchomości na ostatniej osi, więc każdy wiersz wyniku to ciągły blok pamięci
+    firing = np.fmin(np.fmin(a[:, None, None], r[None, :, None]), c[None, None, :]).reshape(-1, a.shape[1])
+    # trójki posortowane według termu wyjścia, maksimum w każdej grupie liczy jedno np.fmax.reduceat
+    outputs, triples = np.nonzero(table.reshape(-1, table.shape[-1]).T)
+    counts = np.bincount(outputs, minlength=table.shape[-1])
+    cuts = np.zeros((table.shape[-1], a.shape[1]))
+    used = counts > 0
+    cuts[used] = np.fmax.reduceat(firing[triples], np.cumsum(counts)[used] - counts[used], axis=0)
+    return cuts.T
+
+
+RULE_TABLE = table_from_rules(value_ctrl.rules)
+
+
+if __name__ == '__main__':
+    from batch import consequent_cuts, memberships, value_batch
+
+    parser = argparse.ArgumentParser(description='Tablica reguł wyceny nieruchomości')
+    parser.add_argument('--export', metavar='PATH', help='zapisuje reguły z Zadanie2.py do pliku CSV')
+    parser.add_argument('--rules', metavar='PATH', help='plik CSV z tablicą reguł')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='porównanie z regułami skfuzzy na N nieruchomościach')
+    args = parser.parse_args()
+
+    if args.export:
+        save_table(RULE_TABLE, args.export)
+        print('Zapisano {} reguł do {}'.format(RULE_TABLE.sum(), args.export))
+    table = load_table(args.rules) if args.rules else RULE_TABLE
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        inputs = rng.uniform(20, 120, args.benchmark), rng.uniform(1, 5, args.benchmark), rng.uniform(1, 3, args.benchmark)
+        membership = memberships(*inputs)
+        start = time.perf_counter()
+        tree = consequent_cuts(membership)
+        tree_time = time.perf_counter() - start
+        start = time.perf_counter()
+        tensor = table_cuts(membership, table)
+        tensor_time = time.perf_counter() - start
+        print('Reguły skfuzzy (drzewo AND/OR): {:.4f} s'.format(tree_time))
+        print('Tablica reguł: {:.4f} s, {:.1f}x szybciej'.format(tensor_time, tree_time / tensor_time))
+        print('Największa różnica poziomów odcięcia: {}'.format(np.abs(tree - tensor).max()))
+        print('Największa różnica wyceny: {:.6f} PLN'.format(
+            np.abs(value_batch(*inputs) - value_batch(*inputs, rule_table=table)).max()))
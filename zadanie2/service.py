@@ -0,0 +1,197 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+"""
+Usługa wyceny nieruchomości
+-------------------
+Długo działający serwer HTTP (asyncio) odpowiadający na zapytania o wycenę. Układ sterowania z Zadanie2.py
+jest budowany raz, przy imporcie modułu, a nie przy każdym zapytaniu. Wyniki są zapamiętywane w pamięci
+podręcznej LRU, której kluczem są wejścia zaokrąglone do ustalonego kroku, więc powtarzające się
+(lub prawie takie same) zapytania nie uruchamiają wnioskowania ponownie.
+Wykres value.view rysowany jest tylko na żądanie (/plot).
+
+Zapytania:
+    GET /value?area=105&rooms=4&communication=3   -> {"value": 1301224.13, "cached": false, "ms": 33.1}
+    GET /metrics                                  -> trafienia w pamięć podręczną i opóźnienia zapytań
+    GET /plot?area=105&rooms=4&communication=3    -> wykres PNG
+
+Użycie:
+    python service.py --port 8080
+"""
+import argparse
+import asyncio
+import functools
+import io
+import json
+import math
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+import matplotlib
+import numpy as np
+
+matplotlib.use('Agg')  # skfuzzy.control importuje matplotlib.pyplot, usługa nie potrzebuje okien GUI
+from Zadanie2 import valuation, value  # noqa: E402
+
+
+class ValuationService:
+
+    def __init__(self, cache_size=100000, steps=(0.1, 0.01, 0.01), window=10000):
+        """
+        Parameters:
+            cache_size (int): największa liczba zapamiętanych wycen
+            steps (tuple): krok zaokrąglenia area, number of rooms i communication przed wyszukaniem w pamięci
+            window (int): liczba ostatnich zapytań, z których liczone są percentyle opóźnień
+        """
+        self.steps = steps
+        self.lock = threading.Lock()  # ControlSystemSimulation nie może liczyć dwóch wycen naraz
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.local = threading.local()  # czy bieżące zapytanie w tym wątku liczyło wycenę
+        self.cached_value = functools.lru_cache(maxsize=cache_size)(self.compute)
+
+    def quantize(self, area_value, rooms, communication_value):
+        """
+        Zaokrągla wejścia do kroku pamięci podręcznej
+            Return:
+                key (tuple): klucz w pamięci podręcznej
+        """
+        return tuple(round(round(x / step) * step, 6)
+                     for x, step in zip((area_value, rooms, communication_value), self.steps))
+
+    def compute(self, area_value, rooms, communication_value):
+        """
+        Dokładna wycena przez wnioskowanie skfuzzy
+            Return:
+                value (float): wartość nieruchomości
+        """
+        self.local.computed = True  # lru_cache wywołuje compute w wątku zapytania tylko przy chybieniu
+        with self.lock:
+            valuation.input['area'] = area_value
+            valuation.input['number of rooms'] = rooms
+            valuation.input['communication'] = communication_value
+            valuation.compute()
+            return float(valuation.output['value'])
+
+    def valuate(self, area_value, rooms, communication_value):
+        """
+        Wycena z użyciem pamięci podręcznej
+            Return:
+                result (dict): wartość, czy pochodzi z pamięci podręcznej i czas w milisekundach
+        """
+        start = time.perf_counter()
+        self.local.computed = False
+        result = self.cached_value(*self.quantize(area_value, rooms, communication_value))
+        cached = not self.local.computed
+        elapsed = time.perf_counter() - start
+        self.latencies.append(elapsed)
+        self.requests += 1
+        return {'value': round(result, 2), 'cached': cached, 'ms': round(elapsed * 1000, 3)}
+
+    def metrics(self):
+        """
+        Return:
+            metrics (dict): trafienia w pamięć podręczną i percentyle opóźnień w milisekundach
+        """
+        info = self.cached_value.cache_info()
+        lookups = info.hits + info.misses
+        result = {'requests': self.requests, 'cache_hits': info.hits, 'cache_misses': info.misses,
+                  'cache_size': info.currsize, 'hit_rate': info.hits / lookups if lookups else 0.}
+        if self.latencies:
+            p50, p90, p99 = 1000 * np.percentile(self.latencies, [50, 90, 99])
+            result.update({'p50_ms': round(p50, 3), 'p90_ms': round(p90, 3), 'p99_ms': round(p99, 3)})
+        return result
+
+    def plot(self, area_value, rooms, communication_value):
+        """
+        Rysuje value.view dla podanych wejść bez otwierania okna (backend Agg), tylko na żądanie
+            Return:
+                png (bytes): wykres w formacie PNG
+        """
+        import matplotlib.pyplot as plt
+        from skfuzzy.control.visualization import FuzzyVariableVisualizer
+
+        with self.lock:
+            valuation.input['area'] = area_value
+            valuation.input['number of rooms'] = rooms
+            valuation.input['communication'] = communication_value
+            valuation.compute()
+            figure, _ = FuzzyVariableVisualizer(value).view(sim=valuation)  # value.view wywołuje też fig.show()
+            buffer = io.BytesIO()
+            figure.savefig(buffer, format='png')
+            plt.close(figure)
+        return buffer.getvalue()
+
+
+def inputs(query):
+    """
+    Odczytuje wejścia z parametrów zapytania, wartości nieskończone i NaN są odrzucane
+        Parameters:
+            query (dict): wynik parse_qs
+        Return:
+            inputs (tuple): area, number of rooms, communication
+    """
+    result = tuple(float(query[name][0]) for name in ('area', 'rooms', 'communication'))
+    if not all(math.isfinite(x) for x in result):
+        raise ValueError('wejścia muszą być liczbami skończonymi')
+    return result
+
+
+async def handle(service, reader, writer):
+    """
+    Obsługuje jedno zapytanie HTTP, cięższe obliczenia wykonywane są w wątku, by nie blokować pętli zdarzeń
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass  # nagłówki nie są potrzebne
+        url = urlsplit(request_line[1] if len(request_line) > 1 else '/')
+        query = parse_qs(url.query)
+        content_type = 'application/json'
+        if url.path == '/value':
+            body = json.dumps(await loop.run_in_executor(None, service.valuate, *inputs(query)))
+            status = '200 OK'
+        elif url.path == '/metrics':
+            body, status = json.dumps(service.metrics()), '200 OK'
+        elif url.path == '/plot':
+            body = await loop.run_in_executor(None, service.plot, *inputs(query))
+            status, content_type = '200 OK', 'image/png'
+        else:
+            body, status = json.dumps({'error': 'not found'}), '404 Not Found'
+    except (KeyError, ValueError, IndexError, OverflowError) as error:
+        body, status = json.dumps({'error': 'bad request: {}'.format(error)}), '400 Bad Request'
+    body = body if isinstance(body, bytes) else body.encode('utf-8')
+    writer.write('HTTP/1.1 {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: close\r\n\r\n'.format(
+        status, content_type, len(body)).encode('latin-1') + body)
+    await writer.drain()
+    writer.close()
+
+
+async def serve(host='127.0.0.1', port=8080, service=None):
+    """
+    Uruchamia serwer HTTP i działa do przerwania
+        Parameters:
+            host (str): adres nasłuchiwania
+            port (int): port nasłuchiwania
+            service (ValuationService): usługa wyceny, domyślnie nowa
+    """
+    service = service or ValuationService()
+    server = await asyncio.start_server(functools.partial(handle, service), host, port)
+    print('Usługa wyceny nasłuchuje na http://{}:{}'.format(host, port))
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Usługa wyceny nieruchomości')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, ValuationService(args.cache_size)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,281 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+"""
+Prekompilowana powierzchnia wyceny
+-------------------
+Układ sterowania z Zadanie2.py ma tylko trzy wejścia, więc zamiast uruchamiać wnioskowanie skfuzzy
+i defuzyfikację przy każdej wycenie, próbkujemy go raz na siatce 3-D (area x number of rooms x communication)
+i zapisujemy wyniki do pliku .npz. Wycena to wtedy interpolacja trójliniowa między ośmioma sąsiednimi
+węzłami siatki, która trwa mikrosekundy zamiast milisekund.
+
+Przy budowaniu porównujemy interpolację z dokładnym wnioskowaniem w losowych punktach. Dopóki maksymalny błąd
+przekracza tolerancję, zmniejszamy o połowę krok tej osi, wzdłuż której interpolacja myli się najbardziej,
+a gdy siatka miałaby więcej niż max_nodes węzłów, budowanie kończy się błędem. Domyślna tolerancja 30 000 PLN
+to odstęp próbkowania uniwersum wartości w Zadanie2.py. Zmierzony błąd zapisujemy w pliku razem z siatką.
+
+Użycie:
+    python surface.py build --output surface.npz --tolerance 30000
+    python surface.py check --surface surface.npz
+"""
+import argparse
+import time
+
+import numpy as np
+from skfuzzy import control as ctrl
+
+from Zadanie2 import area, communication, number_of_rooms, valuation, value_ctrl
+
+
+def exact_value(area_value, rooms, communication_value):
+    """
+    Dokładna wycena przez wnioskowanie skfuzzy
+        Parameters:
+            area_value (float): powierzchnia, 20 - 118
+            rooms (float): liczba pokoi, 1 - 5
+            communication_value (float): skomunikowanie, 1 - 3
+        Return:
+            value (float): wartość nieruchomości
+    """
+    valuation.input['area'] = area_value
+    valuation.input['number of rooms'] = rooms
+    valuation.input['communication'] = communication_value
+    valuation.compute()
+    return valuation.output['value']
+
+
+def exact_values(areas, rooms, communications, chunk_size=20000):
+    """
+    Dokładna wycena wielu punktów naraz, skfuzzy liczy wnioskowanie na tablicach
+        Parameters:
+            areas (array): powierzchnie
+            rooms (array): liczby pokoi
+            communications (array): skomunikowanie
+            chunk_size (int): liczba punktów jednego wywołania compute()
+        Return:
+            values (array): wartości nieruchomości
+    """
+    areas, rooms, communications = (np.asarray(x, dtype=float).ravel() for x in (areas, rooms, communications))
+    values = []
+    for start in range(0, len(areas), chunk_size):
+        # osobna symulacja, współdzielone valuation zostaje dla pojedynczych wycen
+        simulation = ctrl.ControlSystemSimulation(value_ctrl)
+        simulation.input['area'] = areas[start:start + chunk_size]
+        simulation.input['number of rooms'] = rooms[start:start + chunk_size]
+        simulation.input['communication'] = communications[start:start + chunk_size]
+        simulation.compute()
+        values.append(np.asarray(simulation.output['value'], dtype=float).ravel())
+    return np.concatenate(values) if values else np.zeros(0)
+
+
+def axis(universe, step):
+    """
+    Węzły siatki od początku do końca uniwersum zmiennej
+        Parameters:
+            universe (array): uniwersum zmiennej wejściowej
+            step (float): odstęp węzłów
+        Return:
+            nodes (array): węzły siatki
+    """
+    return np.linspace(universe[0], universe[-1], int(round((universe[-1] - universe[0]) / step)) + 1)
+
+
+def axis_error(points, exact, nodes, dimension):
+    """
+    Błąd interpolacji liniowej wzdłuż jednej osi, między dwoma sąsiednimi węzłami tej osi
+        Parameters:
+            points (array): punkty, kształt (n, 3)
+            exact (array): dokładne wyceny punktów
+            nodes (array): węzły osi
+            dimension (int): numer osi, 0 area, 1 number of rooms, 2 communication
+        Return:
+            error (float): maksymalny błąd w punktach
+    """
+    i = np.clip(np.searchsorted(nodes, points[:, dimension], side='right') - 1, 0, len(nodes) - 2)
+    low, high = points.copy(), points.copy()
+    low[:, dimension], high[:, dimension] = nodes[i], nodes[i + 1]
+    t = (points[:, dimension] - nodes[i]) / (nodes[i + 1] - nodes[i])
+    low_values, high_values = exact_values(*low.T), exact_values(*high.T)
+    return float(np.abs(low_values + t * (high_values - low_values) - exact).max())
+
+
+class ValuationSurface:
+
+    def __init__(self, area_nodes, rooms_nodes, communication_nodes, values, errors=None):
+        """
+        Parameters:
+            area_nodes (array): równo rozłożone węzły siatki dla area
+            rooms_nodes (array): równo rozłożone węzły siatki dla number of rooms
+            communication_nodes (array): równo rozłożone węzły siatki dla communication
+            values (array): wyceny w węzłach, kształt (len(area_nodes), len(rooms_nodes), len(communication_nodes))
+            errors (dict): błąd interpolacji zmierzony przy budowaniu
+        """
+        self.nodes = (np.asarray(area_nodes, dtype=float), np.asarray(rooms_nodes, dtype=float),
+                      np.asarray(communication_nodes, dtype=float))
+        self.values = np.asarray(values, dtype=float)
+        self.errors = errors or {}
+        # parametry osi i spłaszczona siatka jako zwykłe listy, wycena pojedynczego punktu nie używa NumPy
+        self._axes = [(float(n[0]), float(n[1] - n[0]), len(n)) for n in self.nodes]
+        self._flat = self.values.ravel().tolist()
+        self._strides = (self.values.shape[1] * self.values.shape[2], self.values.shape[2], 1)
+
+    @classmethod
+    def build(cls, area_step=2.0, rooms_step=0.5, communication_step=0.5, tolerance=30000.0, check_points=2000,
+              max_nodes=1000000, seed=0):
+        """
+        Próbkuje układ sterowania na siatce, zagęszczając ją aż błąd interpolacji w losowych punktach
+        nie przekracza tolerancji
+            Parameters:
+                area_step (float): początkowy odstęp węzłów dla area
+                rooms_step (float): początkowy odstęp węzłów dla number of rooms
+                communication_step (float): początkowy odstęp węzłów dla communication
+                tolerance (float): dopuszczalny maksymalny błąd bezwzględny w PLN
+                check_points (int): liczba losowych punktów do pomiaru błędu
+                max_nodes (int): największa dopuszczalna liczba węzłów siatki
+                seed (int): ziarno generatora losowego
+            Return:
+                surface (ValuationSurface): powierzchnia wyceny
+        """
+        universes = (area.universe, number_of_rooms.universe, communication.universe)
+        steps = [area_step, rooms_step, communication_step]
+        rng = np.random.default_rng(seed)
+        points = np.column_stack([rng.uniform(u[0], u[-1], check_points) for u in universes])
+        exact = exact_values(*points.T)
+        while True:
+            nodes = tuple(axis(u, step) for u, step in zip(universes, steps))
+            if np.prod([len(n) for n in nodes]) > max_nodes:
+                raise ValueError('siatka spełniająca tolerancję {:,.0f} PLN ma więcej niż {} węzłów'.format(
+                    tolerance, max_nodes))
+            grid = np.meshgrid(*nodes, indexing='ij')
+            surface = cls(*nodes, exact_values(*grid).reshape(grid[0].shape))
+            error = np.abs(surface.values_of(*points.T) - exact)
+            surface.errors = {'max_abs_error': float(error.max()), 'mean_abs_error': float(error.mean()),
+                              'max_rel_error': float((error / exact).max())}
+            if error.max() <= tolerance:
+                return surface
+            # połowa kroku dla osi, wzdłuż której interpolacja myli się najbardziej w punktach ponad tolerancją
+            bad = error > tolerance
+            errors = [axis_error(points[bad], exact[bad], n, dimension) for dimension, n in enumerate(nodes)]
+            steps[int(np.argmax(errors))] /= 2
+
+    @classmethod
+    def load(cls, path):
+        """
+        Wczytuje powierzchnię zapisaną przez save
+            Parameters:
+                path (str): ścieżka do pliku .npz
+            Return:
+                surface (ValuationSurface): powierzchnia wyceny
+        """
+        with np.load(path) as data:
+            errors = {key[len('error_'):]: data[key].item() for key in data.files if key.startswith('error_')}
+            return cls(data['area'], data['rooms'], data['communication'], data['values'], errors)
+
+    def save(self, path):
+        """
+        Zapisuje siatkę i zmierzony błąd do pliku .npz
+            Parameters:
+                path (str): ścieżka do pliku .npz
+        """
+        np.savez(path, area=self.nodes[0], rooms=self.nodes[1], communication=self.nodes[2], values=self.values,
+                 **{'error_' + key: value for key, value in self.errors.items()})
+
+    def value(self, area_value, rooms, communication_value):
+        """
+        Wycena jednej nieruchomości, wartości spoza siatki są przycinane do jej brzegu
+            Parameters:
+                area_value (float): powierzchnia
+                rooms (float): liczba pokoi
+                communication_value (float): skomunikowanie
+            Return:
+                value (float): wartość nieruchomości
+        """
+        offset, weights = 0, []
+        for x, (start, step, count), stride in zip((area_value, rooms, communication_value), self._axes,
+                                                   self._strides):
+            position = min(max((x - start) / step, 0.0), count - 1.0)
+            i = min(int(position), count - 2)
+            offset += i * stride
+            weights.append((position - i, stride))
+        (ta, sa), (tr, sr), (tc, sc) = weights
+        v = self._flat
+        # interpolacja wzdłuż communication, potem number of rooms, na końcu area
+        c00 = v[offset] + tc * (v[offset + sc] - v[offset])
+        c01 = v[offset + sr] + tc * (v[offset + sr + sc] - v[offset + sr])
+        c10 = v[offset + sa] + tc * (v[offset + sa + sc] - v[offset + sa])
+        c11 = v[offset + sa + sr] + tc * (v[offset + sa + sr + sc] - v[offset + sa + sr])
+        c0 = c00 + tr * (c01 - c00)
+        c1 = c10 + tr * (c11 - c10)
+        return c0 + ta * (c1 - c0)
+
+    def values_of(self, areas, rooms, communications):
+        """
+        Wycena wielu nieruchomości naraz
+            Parameters:
+                areas (array): powierzchnie
+                rooms (array): liczby pokoi
+                communications (array): skomunikowanie
+            Return:
+                values (array): wartości nieruchomości
+        """
+        indexes, fractions = [], []
+        for x, nodes in zip((areas, rooms, communications), self.nodes):
+            position = np.clip((np.asarray(x, dtype=float) - nodes[0]) / (nodes[1] - nodes[0]), 0, len(nodes) - 1)
+            i = np.minimum(position.astype(int), len(nodes) - 2)
+            indexes.append(i)
+            fractions.append(position - i)
+        (ia, ir, ic), (ta, tr, tc) = indexes, fractions
+        v = self.values
+        c00 = v[ia, ir, ic] + tc * (v[ia, ir, ic + 1] - v[ia, ir, ic])
+        c01 = v[ia, ir + 1, ic] + tc * (v[ia, ir + 1, ic + 1] - v[ia, ir + 1, ic])
+        c10 = v[ia + 1, ir, ic] + tc * (v[ia + 1, ir, ic + 1] - v[ia + 1, ir, ic])
+        c11 = v[ia + 1, ir + 1, ic] + tc * (v[ia + 1, ir + 1, ic + 1] - v[ia + 1, ir + 1, ic])
+        c0 = c00 + tr * (c01 - c00)
+        c1 = c10 + tr * (c11 - c10)
+        return c0 + ta * (c1 - c0)
+
+
+def report(surface, repeats=10000):
+    """
+    Wypisuje błąd interpolacji i porównuje czas wyceny z valuation.compute()
+        Parameters:
+            surface (ValuationSurface): powierzchnia wyceny
+            repeats (int): liczba wycen z powierzchni do pomiaru czasu
+    """
+    for key, error in surface.errors.items():
+        print('{}: {:,.4f}'.format(key, error))  # błąd w PLN, max_rel_error jako ułamek wartości
+    start = time.perf_counter()
+    for _ in range(20):
+        exact = exact_value(105, 4, 3)
+    exact_time = (time.perf_counter() - start) / 20
+    start = time.perf_counter()
+    for _ in range(repeats):
+        interpolated = surface.value(105, 4, 3)
+    surface_time = (time.perf_counter() - start) / repeats
+    print('valuation.compute(): {:,.2f} PLN, {:.1f} us'.format(exact, exact_time * 1e6))
+    print('ValuationSurface.value(): {:,.2f} PLN, {:.1f} us ({:.0f}x)'.format(interpolated, surface_time * 1e6,
+                                                                              exact_time / surface_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prekompilowana powierzchnia wyceny nieruchomości')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='próbkuje układ sterowania i zapisuje siatkę')
+    build_parser.add_argument('--output', default='surface.npz')
+    build_parser.add_argument('--area-step', type=float, default=2.0)
+    build_parser.add_argument('--rooms-step', type=float, default=0.5)
+    build_parser.add_argument('--communication-step', type=float, default=0.5)
+    build_parser.add_argument('--tolerance', type=float, default=30000.0, help='maksymalny błąd interpolacji w PLN')
+    build_parser.add_argument('--check-points', type=int, default=2000)
+    build_parser.add_argument('--max-nodes', type=int, default=1000000)
+    check_parser = commands.add_parser('check', help='wypisuje błąd i czas wyceny zapisanej siatki')
+    check_parser.add_argument('--surface', default='surface.npz')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        surface = ValuationSurface.build(args.area_step, args.rooms_step, args.communication_step, args.tolerance,
+                                         args.check_points, args.max_nodes)
+        surface.save(args.output)
+        print('Zapisano siatkę {} do {}'.format(surface.values.shape, args.output))
+    else:
+        surface = ValuationSurface.load(args.surface)
+    report(surface)
@@ -0,0 +1,193 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# pip install numpy
+# pip install scipy
+
+# Recommendations for all users at once, on a process pool.
+# The rating matrix (CSR and CSC arrays) is copied once into shared memory, every worker process maps
+# the same memory instead of receiving its own copy, and the users are split into shards of rows.
+#
+# For every user the predicted rating of a movie not rated by the user is the weighted mean of the ratings
+# of his top-k neighbours (euclidean score as the weight) who rated it. With k=1 this is the rating of the
+# best neighbour, like in zadanie3.py. Recommended movies have the highest predicted ratings,
+# not recommended movies the lowest.
+#
+# Results are saved as one .npz file: users, movies and users x N arrays of movie ids (-1 when there are fewer)
+# and predicted ratings.
+#
+# usage: python batch_recommend.py --ratings movies.json --output recommendations.npz --neighbors 5 --processes 4
+
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+
+from rating_matrix import RatingMatrix
+
+_matrix = None  # RatingMatrix of the worker process, its arrays are in shared memory
+_memory = []  # shared memory blocks mapped by the worker process
+
+
+def _share(array):
+    """
+    Copy an array into a new shared memory block
+    Parameters:
+        array (array): array to share
+    Returns:
+        tuple: shared memory block and (name, shape, dtype) needed to map it in another process
+    """
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=memory.buf)[:] = array
+    return memory, (memory.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    memory = shared_memory.SharedMemory(name=name)
+    _memory.append(memory)
+    return np.ndarray(shape, dtype, buffer=memory.buf)
+
+
+def _init_worker(users, movies, shape, csr, csc):
+    """
+    Build the worker RatingMatrix once per process from the shared arrays
+    Parameters:
+        users (list): user names
+        movies (list): movie titles
+        shape (tuple): shape of the rating matrix
+        csr (tuple): specs of data, indices and indptr of the CSR ratings
+        csc (tuple): specs of data, indices and indptr of the CSC ratings
+    """
+    global _matrix
+    ratings = sparse.csr_matrix(tuple(_attach(spec) for spec in csr), shape=shape, copy=False)
+    by_movie = sparse.csc_matrix(tuple(_attach(spec) for spec in csc), shape=shape, copy=False)
+    _matrix = RatingMatrix(users, movies, ratings, by_movie)
+
+
+# Predicted ratings of movies not rated by the user, from his top-k neighbours
+def recommend(matrix, user, neighbors, num_movies):
+    """
+            Parameters:
+                matrix (RatingMatrix): Ratings of all users
+                user (str): User to recommend for
+                neighbors (int): Number of neighbours k
+                num_movies (int): Number of recommended and of not recommended movies N
+            Return:
+                recommended, not_recommended (tuple): Return two (movie ids, predicted ratings) pairs,
+                sorted from the best and from the worst predicted rating
+    """
+    scores = matrix.euclidean_scores(user)
+    i = matrix.user_index[user]
+    scores[i] = -np.inf  # skip the input user
+    k = min(neighbors, len(scores) - 1)
+    top = np.argpartition(-scores, k - 1)[:k] if k > 0 else np.array([], dtype=int)
+    top = top[scores[top] > 0]  # users without a common movie say nothing about this user
+    rows = matrix.ratings[top]
+    weights = np.repeat(scores[top], np.diff(rows.indptr))
+    sums = np.bincount(rows.indices, weights=weights * rows.data, minlength=len(matrix.movies))
+    weight_sums = np.bincount(rows.indices, weights=weights, minlength=len(matrix.movies))
+    weight_sums[matrix.row(user)[0]] = 0  # movies already rated by the user
+    candidates = np.nonzero(weight_sums > 0)[0]
+    predicted = sums[candidates] / weight_sums[candidates]
+    order = np.argsort(-predicted, kind='stable')
+    best, worst = order[:num_movies], order[::-1][:num_movies]
+    return (candidates[best], predicted[best]), (candidates[worst], predicted[worst])
+
+
+def _recommend_shard(task):
+    """
+    Recommendations for one shard of users
+    Parameters:
+        task (tuple): first and last (exclusive) user row, k, N
+    Returns:
+        tuple: first row and arrays of recommended and not recommended movie ids and predicted ratings
+    """
+    start, end, neighbors, num_movies = task
+    ids = np.full((2, end - start, num_movies), -1, dtype=np.int32)
+    predicted = np.full((2, end - start, num_movies), np.nan, dtype=np.float32)
+    for row in range(start, end):
+        for side, (movies, ratings) in enumerate(recommend(_matrix, _matrix.users[row], neighbors, num_movies)):
+            ids[side, row - start, :len(movies)] = movies
+            predicted[side, row - start, :len(movies)] = ratings
+    return start, ids, predicted
+
+
+# Recommendations for all users of the matrix, computed on a process pool
+def recommend_all(matrix, neighbors=5, num_movies=5, processes=None, shard_size=256):
+    """
+            Parameters:
+                matrix (RatingMatrix): Ratings of all users
+                neighbors (int): Number of neighbours k
+                num_movies (int): Number of recommended and of not recommended movies N
+                processes (int): Number of worker processes, all CPU cores by default
+                shard_size (int): Number of users in one task
+            Return:
+                ids, predicted (tuple): Return 2 x users x N arrays of movie ids and predicted ratings,
+                index 0 are recommended and index 1 not recommended movies
+    """
+    n = len(matrix.users)
+    ids = np.full((2, n, num_movies), -1, dtype=np.int32)
+    predicted = np.full((2, n, num_movies), np.nan, dtype=np.float32)
+    blocks, csr, csc = [], [], []
+    try:
+        for source, specs in ((matrix.ratings, csr), (matrix.by_movie, csc)):
+            for array in (source.data, source.indices, source.indptr):
+                memory, spec = _share(array)
+                blocks.append(memory)
+                specs.append(spec)
+        tasks = [(start, min(start + shard_size, n), neighbors, num_movies) for start in range(0, n, shard_size)]
+        with multiprocessing.Pool(processes or os.cpu_count(), _init_worker,
+                                  (matrix.users, matrix.movies, matrix.ratings.shape, csr, csc)) as pool:
+            for start, shard_ids, shard_predicted in pool.imap_unordered(_recommend_shard, tasks):
+                ids[:, start:start + shard_ids.shape[1]] = shard_ids
+                predicted[:, start:start + shard_ids.shape[1]] = shard_predicted
+    finally:
+        for memory in blocks:
+            memory.close()
+            memory.unlink()
+    return ids, predicted
+
+
+def save_recommendations(path, matrix, ids, predicted):
+    """
+            Parameters:
+                path (str): Path to the .npz file
+                matrix (RatingMatrix): Ratings of all users
+                ids (array): Movie ids from recommend_all
+                predicted (array): Predicted ratings from recommend_all
+    """
+    np.savez_compressed(path, users=np.array(matrix.users), movies=np.array(matrix.movies),
+                        recommended=ids[0], recommended_ratings=predicted[0],
+                        not_recommended=ids[1], not_recommended_ratings=predicted[1])
+
+
+if __name__ == '__main__':
+
+    import argparse
+
+    from rating_matrix import synthetic_dataset
+    from ratings_io import read_ratings
+
+    parser = argparse.ArgumentParser(description='Recommendations for all users on a process pool')
+    parser.add_argument('--ratings', help='rating file read by read_ratings, synthetic users if not given')
+    parser.add_argument('--users', type=int, default=10000, help='number of synthetic users')
+    parser.add_argument('--neighbors', type=int, default=5)
+    parser.add_argument('--movies', type=int, default=5, help='number of recommended and not recommended movies')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--output', default='recommendations.npz')
+    args = parser.parse_args()
+
+    if args.ratings:
+        matrix = RatingMatrix.from_ratings(read_ratings(args.ratings))
+    else:
+        matrix = RatingMatrix.from_dataset(synthetic_dataset(args.users))
+    start = time.perf_counter()
+    ids, predicted = recommend_all(matrix, args.neighbors, args.movies, args.processes)
+    elapsed = time.perf_counter() - start
+    save_recommendations(args.output, matrix, ids, predicted)
+    print('%d users in %.2f s, %.0f users/s, saved to %s' % (len(matrix.users), elapsed,
+                                                             len(matrix.users) / elapsed, args.output))
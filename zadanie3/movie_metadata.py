@@ -0,0 +1,181 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# IMDB API reference: https://imdbpy.readthedocs.io/en/latest/
+
+# pip install cinemagoer
+
+# Movie metadata (year, rating, votes, budget, directors) for recommended titles.
+# Results are kept in a local SQLite cache keyed by title and expire after a TTL,
+# titles missing from the cache are fetched concurrently in a bounded thread pool.
+# The provider is pluggable: CinemagoerProvider asks IMDB, StubProvider answers from a local JSON file
+# for offline runs, e.g.
+#     {"Pulp Fiction": {"year": 1994, "rating": 8.9, "votes": 2000000, "budget": "$8,000,000",
+#                       "directors": ["Quentin Tarantino"]}}
+
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FIELDS = ('year', 'rating', 'votes', 'budget', 'directors')
+
+
+# Metadata from IMDB through Cinemagoer
+class CinemagoerProvider:
+
+    def __init__(self):
+        from imdb import Cinemagoer
+
+        # Create connection to IMDB API
+        self.ia = Cinemagoer()
+
+    def fetch(self, title):
+        """
+            Parameters:
+                title (str): Movie title
+            Return:
+                metadata (dict): Return year, rating, votes, budget and directors of the first search result
+        """
+        movies = self.ia.search_movie(title)
+        if not movies:
+            return None
+        movie = self.ia.get_movie(movies[0].movieID)
+        box_office = movie.get('box office') or {}
+        return {'year': movie.get('year'), 'rating': movie.get('rating'), 'votes': movie.get('votes'),
+                'budget': box_office.get('Budget'),
+                'directors': [director['name'] for director in movie.get('directors', [])]}
+
+
+# Metadata from a local JSON file, title -> metadata
+class StubProvider:
+
+    def __init__(self, movies, delay=0.0):
+        """
+            Parameters:
+                movies (dict or str): metadata of movies or path to a JSON file with them
+                delay (float): seconds slept in every fetch, to imitate network latency
+        """
+        if isinstance(movies, str):
+            with open(movies, 'r', encoding="UTF-8") as f:
+                movies = json.loads(f.read())
+        self.movies = movies
+        self.delay = delay
+
+    def fetch(self, title):
+        if self.delay:
+            time.sleep(self.delay)
+        movie = self.movies.get(title)
+        return None if movie is None else {field: movie.get(field) for field in FIELDS}
+
+
+# SQLite cache of metadata, entries older than ttl seconds are fetched again
+class MetadataCache:
+
+    def __init__(self, path='metadata.sqlite', ttl=7 * 24 * 3600):
+        """
+            Parameters:
+                path (str): SQLite database file, ':memory:' for a cache that is not saved
+                ttl (float): lifetime of an entry in seconds
+        """
+        self.ttl = ttl
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS metadata '
+                                '(title TEXT PRIMARY KEY, data TEXT, fetched REAL)')
+
+    def get_many(self, titles):
+        """
+            Parameters:
+                titles (list): Movie titles
+            Return:
+                metadata (dict): Return title -> metadata for the titles with a fresh entry
+        """
+        titles = list(titles)
+        if not titles:
+            return {}
+        rows = self.connection.execute(
+            'SELECT title, data FROM metadata WHERE fetched >= ? AND title IN (%s)' % ','.join('?' * len(titles)),
+            [time.time() - self.ttl] + titles)
+        return {title: json.loads(data) for title, data in rows}
+
+    def put_many(self, metadata):
+        """
+            Parameters:
+                metadata (dict): title -> metadata, None is stored too so unknown titles are not searched again
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?, ?)',
+                                        [(title, json.dumps(data), now) for title, data in metadata.items()])
+
+    def close(self):
+        self.connection.close()
+
+
+# Cached metadata, cache misses are fetched by the provider in parallel
+class MovieMetadata:
+
+    def __init__(self, provider, cache=None, workers=8):
+        """
+            Parameters:
+                provider: object with fetch(title) returning metadata dict or None
+                cache (MetadataCache): local cache, by default an in-memory one
+                workers (int): maximal number of concurrent fetches
+        """
+        self.provider = provider
+        self.cache = cache if cache is not None else MetadataCache(':memory:')
+        self.workers = workers
+
+    def get_many(self, titles):
+        """
+            Parameters:
+                titles (list): Movie titles
+            Return:
+                metadata (dict): Return title -> metadata (None for unknown titles and failed fetches)
+                                 in the order of titles
+        """
+        titles = list(dict.fromkeys(titles))
+        found = self.cache.get_many(titles)
+        missing = [title for title in titles if title not in found]
+        if missing:
+            # only fetching runs in the pool, the SQLite connection is used by this thread only
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                results = dict(zip(missing, pool.map(self._fetch, missing)))
+            # a failed fetch is not cached, so the title is fetched again next time
+            self.cache.put_many({title: metadata for title, (metadata, ok) in results.items() if ok})
+            found.update({title: metadata for title, (metadata, _) in results.items()})
+        return {title: found[title] for title in titles}
+
+    def _fetch(self, title):
+        """
+            Return:
+                result (tuple): Return metadata of the title and False if the provider raised an error
+        """
+        try:
+            return self.provider.fetch(title), True
+        except Exception as error:
+            print('Cannot fetch metadata of %s: %s' % (title, error))
+            return None, False
+
+    def get(self, title):
+        return self.get_many([title])[title]
+
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Movie metadata with a local cache')
+    parser.add_argument('titles', nargs='+')
+    parser.add_argument('--cache', default='metadata.sqlite')
+    parser.add_argument('--ttl', type=float, default=7 * 24 * 3600, help='lifetime of a cache entry in seconds')
+    parser.add_argument('--stub', help='JSON file with metadata used instead of IMDB')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    provider = StubProvider(args.stub) if args.stub else CinemagoerProvider()
+    metadata = MovieMetadata(provider, MetadataCache(args.cache, args.ttl), args.workers)
+    start = time.perf_counter()
+    for title, movie in metadata.get_many(args.titles).items():
+        print(title, movie)
+    print('%d titles in %.3f s' % (len(args.titles), time.perf_counter() - start))
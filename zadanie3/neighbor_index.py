@@ -0,0 +1,195 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# pip install numpy
+# pip install scipy
+
+# Persistent index of the top-K most similar users of every user, for the euclidean and manhattan metric.
+# Users are ranked like in find_similar_users: the highest score first, for both metrics.
+#
+# A changed rating of movie m by user u changes only the scores between u and users who rated m,
+# so an update recomputes the row of u and fixes only the rows of those users, not the whole index.
+
+import time
+
+import numpy as np
+
+from rating_matrix import RatingMatrix
+
+METRICS = ('euclidean', 'manhattan')
+
+
+class NeighborIndex:
+
+    def __init__(self, users, k, neighbors, scores, matrix=None):
+        """
+            Parameters:
+                users (list): user names, row order of the index
+                k (int): number of stored neighbours of every user
+                neighbors (dict): metric -> users x k array of neighbour rows, -1 for a missing neighbour
+                scores (dict): metric -> users x k array of neighbour scores
+                matrix (RatingMatrix): ratings, needed only for updates
+        """
+        self.users = list(users)
+        self.user_index = {user: i for i, user in enumerate(self.users)}
+        self.k = k
+        self.neighbors = neighbors
+        self.scores = scores
+        self.matrix = matrix
+
+    # Compute top-K neighbours of all users
+    @classmethod
+    def build(cls, matrix, k=12):
+        """
+            Parameters:
+                matrix (RatingMatrix): Ratings of all users
+                k (int): Number of neighbours stored for every user
+            Return:
+                index (NeighborIndex): Return index of neighbours
+        """
+        n = len(matrix.users)
+        index = cls(matrix.users, k, {metric: np.full((n, k), -1) for metric in METRICS},
+                    {metric: np.full((n, k), -np.inf) for metric in METRICS}, matrix)
+        for user in matrix.users:
+            index._update_row(user)
+        return index
+
+    # Read the index saved by save
+    @classmethod
+    def load(cls, path, matrix=None):
+        """
+            Parameters:
+                path (str): Path to the .npz file
+                matrix (RatingMatrix): Ratings of all users, needed only for updates
+            Return:
+                index (NeighborIndex): Return index of neighbours
+        """
+        with np.load(path) as data:
+            return cls(data['users'].tolist(), int(data['k']),
+                       {metric: data[metric + '_neighbors'] for metric in METRICS},
+                       {metric: data[metric + '_scores'] for metric in METRICS}, matrix)
+
+    def save(self, path):
+        """
+            Parameters:
+                path (str): Path to the .npz file
+        """
+        arrays = {metric + '_neighbors': self.neighbors[metric] for metric in METRICS}
+        arrays.update({metric + '_scores': self.scores[metric] for metric in METRICS})
+        np.savez(path, users=np.array(self.users), k=self.k, **arrays)
+
+    def _all_scores(self, user, metric):
+        scores = (self.matrix.euclidean_scores(user) if metric == 'euclidean'
+                  else self.matrix.manhattan_scores(user)).astype(float)
+        scores[self.matrix.user_index[user]] = -np.inf  # a user is not his own neighbour
+        return scores
+
+    # Recompute the top-K neighbours of one user from the rating matrix
+    def _update_row(self, user):
+        i = self.user_index[user]
+        for metric in METRICS:
+            scores = self._all_scores(user, metric)
+            k = min(self.k, len(scores) - 1)
+            top = np.argpartition(-scores, k - 1)[:k] if k > 0 else np.array([], dtype=int)
+            top = top[np.argsort(-scores[top], kind='stable')]
+            self.neighbors[metric][i] = -1
+            self.scores[metric][i] = -np.inf
+            self.neighbors[metric][i, :k] = top
+            self.scores[metric][i, :k] = scores[top]
+
+    # Put the new score between user i and neighbour j into the row of user i
+    def _update_pair(self, i, j, score, metric):
+        neighbors, scores = self.neighbors[metric][i], self.scores[metric][i]
+        stored = np.nonzero(neighbors == j)[0]
+        if len(stored):
+            if score < scores[stored[0]] and neighbors[-1] != -1:
+                self._update_row(self.users[i])  # j may fall out, the next best user is not stored
+                return
+            neighbors, scores = np.delete(neighbors, stored[0]), np.delete(scores, stored[0])
+        elif score <= scores[-1]:
+            return  # j is not better than the last stored neighbour
+        else:
+            neighbors, scores = neighbors[:-1], scores[:-1]
+        position = np.searchsorted(-scores, -score, side='right')
+        self.neighbors[metric][i] = np.insert(neighbors, position, j)
+        self.scores[metric][i] = np.insert(scores, position, score)
+
+    # Add or change one rating and update the affected rows of the index
+    def set_rating(self, user, movie, rating):
+        """
+            Parameters:
+                user (str): User name
+                movie (str): Movie title
+                rating (float): Rating
+        """
+        self.matrix.set_rating(user, movie, rating)
+        if user not in self.user_index:  # new user, one more row in the index
+            self.user_index[user] = len(self.users)
+            self.users.append(user)
+            for metric in METRICS:
+                self.neighbors[metric] = np.vstack([self.neighbors[metric], np.full((1, self.k), -1)])
+                self.scores[metric] = np.vstack([self.scores[metric], np.full((1, self.k), -np.inf)])
+        self._update_row(user)
+
+        # only users who rated the movie have a changed score with user
+        rows = self.matrix.column(movie)[0]
+        i = self.user_index[user]
+        for metric in METRICS:
+            scores = self._all_scores(user, metric)
+            for j in rows.tolist():
+                if j != i:
+                    self._update_pair(j, i, scores[j], metric)
+
+    # Finds users in the index that are similar to the input user
+    def similar_users(self, user, num_users=None, metric='euclidean'):
+        """
+            Parameters:
+                user (str): User to compare
+                num_users (int): Number of users, at most k
+                metric (str): 'euclidean' or 'manhattan'
+            Return:
+                scores (list): Return (user, score) pairs sorted in decreasing order of the score
+        """
+        if user not in self.user_index:
+            raise TypeError('Cannot find ' + user + ' in the dataset')
+        i = self.user_index[user]
+        return [(self.users[j], float(score))
+                for j, score in zip(self.neighbors[metric][i][:num_users], self.scores[metric][i][:num_users])
+                if j >= 0]
+
+
+if __name__ == '__main__':
+
+    import argparse
+
+    from rating_matrix import synthetic_dataset
+    from ratings_io import read_ratings
+
+    parser = argparse.ArgumentParser(description='Build, update and query time of the neighbour index')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--k', type=int, default=12)
+    parser.add_argument('--updates', type=int, default=100)
+    parser.add_argument('--output', default='neighbors.npz')
+    parser.add_argument('--ratings', help='rating file read by read_ratings instead of synthetic users')
+    args = parser.parse_args()
+
+    if args.ratings:
+        matrix = RatingMatrix.from_ratings(read_ratings(args.ratings))
+    else:
+        matrix = RatingMatrix.from_dataset(synthetic_dataset(args.users))
+    start = time.perf_counter()
+    index = NeighborIndex.build(matrix, args.k)
+    print('build: %d users in %.2f s' % (len(matrix.users), time.perf_counter() - start))
+    index.save(args.output)
+
+    rng = np.random.default_rng(1)
+    start = time.perf_counter()
+    for _ in range(args.updates):
+        user = matrix.users[rng.integers(len(matrix.users))]
+        index.set_rating(user, matrix.movies[rng.integers(len(matrix.movies))], int(rng.integers(1, 11)))
+    print('update: %.2f ms per changed rating' % ((time.perf_counter() - start) * 1000 / args.updates))
+
+    start = time.perf_counter()
+    for user in matrix.users[:1000]:
+        index.similar_users(user)
+    print('query: %.1f us per user' % ((time.perf_counter() - start) * 1e6 / min(1000, len(matrix.users))))
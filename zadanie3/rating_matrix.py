@@ -0,0 +1,342 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# scipy sparse matrices reference: https://docs.scipy.org/doc/scipy/reference/sparse.html
+
+# pip install numpy
+# pip install scipy
+
+# Ratings from movies.json converted once into a sparse CSR user x movie matrix.
+# Euclidean and manhattan scores over the movies rated by both users are computed for one user
+# against all users at once, instead of calling euclidean_score / manhattan_score for every pair.
+# New ratings from set_rating wait in small dicts, the scores include them, and they are merged into
+# the CSR and CSC matrices once for a batch of merge_every ratings.
+
+import numpy as np
+from scipy import sparse
+
+
+class RatingMatrix:
+
+    def __init__(self, users, movies, ratings, by_movie=None, merge_every=1024):
+        """
+            Parameters:
+                users (list): user names, row order of the matrix
+                movies (list): movie titles, column order of the matrix
+                ratings (csr_matrix): users x movies ratings, every rated movie is a stored entry
+                by_movie (csc_matrix): the same ratings in CSC format, computed from ratings if not given
+                merge_every (int): number of new ratings kept aside before they are merged into the matrices
+        """
+        self.users = list(users)
+        self.movies = list(movies)
+        self.user_index = {user: i for i, user in enumerate(self.users)}
+        self.movie_index = {movie: i for i, movie in enumerate(self.movies)}
+        self._ratings = sparse.csr_matrix(ratings, dtype=np.float64)
+        self._ratings.sort_indices()
+        self._by_movie = self._ratings.tocsc() if by_movie is None else by_movie
+        self.merge_every = merge_every
+        # new (user, movie) entries not merged yet, by row and by column: i -> {j: rating} and j -> {i: rating}
+        self._pending_rows = {}
+        self._pending_columns = {}
+        self._pending = 0
+
+    @property
+    def ratings(self):
+        """
+            Return:
+                ratings (csr_matrix): Return users x movies ratings with all new ratings merged
+        """
+        self.merge()
+        return self._ratings
+
+    @property
+    def by_movie(self):
+        """
+            Return:
+                by_movie (csc_matrix): Return the ratings in CSC format with all new ratings merged
+        """
+        self.merge()
+        return self._by_movie
+
+    # Merge the new ratings into the CSR and CSC matrices, once for a batch of set_rating calls
+    def merge(self):
+        shape = (len(self.users), len(self.movies))
+        if not self._pending and self._ratings.shape == shape:
+            return
+        old = self._ratings.tocoo()
+        rows = [i for i, entries in self._pending_rows.items() for _ in entries]
+        columns = [j for entries in self._pending_rows.values() for j in entries]
+        data = [rating for entries in self._pending_rows.values() for rating in entries.values()]
+        # COO to CSR keeps explicit zeros, a rating of 0 stays a stored entry
+        self._ratings = sparse.csr_matrix((np.concatenate([old.data, data]),
+                                           (np.concatenate([old.row, rows]), np.concatenate([old.col, columns]))),
+                                          shape=shape, dtype=np.float64)
+        self._ratings.sort_indices()
+        self._by_movie = self._ratings.tocsc()
+        self._pending_rows, self._pending_columns, self._pending = {}, {}, 0
+
+    # Add or change one rating
+    def set_rating(self, user, movie, rating):
+        """
+            Parameters:
+                user (str): User name, a new user gets a new row
+                movie (str): Movie title, a new movie gets a new column
+                rating (float): Rating, 0 is stored like any other rating
+        """
+        if user not in self.user_index:
+            self.user_index[user] = len(self.users)
+            self.users.append(user)
+        if movie not in self.movie_index:
+            self.movie_index[movie] = len(self.movies)
+            self.movies.append(movie)
+        i, j = self.user_index[user], self.movie_index[movie]
+        if i < self._ratings.shape[0] and j < self._ratings.shape[1]:
+            start, end = self._ratings.indptr[i], self._ratings.indptr[i + 1]
+            position = start + np.searchsorted(self._ratings.indices[start:end], j)
+            if position < end and self._ratings.indices[position] == j:
+                # the movie was rated before, the sparsity structure does not change
+                self._ratings.data[position] = rating
+                start, end = self._by_movie.indptr[j], self._by_movie.indptr[j + 1]
+                self._by_movie.data[start + np.searchsorted(self._by_movie.indices[start:end], i)] = rating
+                return
+        # a new entry waits in the pending dicts, the matrices are rebuilt once for merge_every new entries
+        if j not in self._pending_rows.setdefault(i, {}):
+            self._pending += 1
+        self._pending_rows[i][j] = rating
+        self._pending_columns.setdefault(j, {})[i] = rating
+        if self._pending >= self.merge_every:
+            self.merge()
+
+    # Convert the dict of dicts dataset into the rating matrix
+    @classmethod
+    def from_dataset(cls, dataset):
+        """
+            Parameters:
+                dataset (dict): File with data, json format
+            Return:
+                matrix (RatingMatrix): Return ratings of all users
+        """
+        users = list(dataset)
+        movies = sorted({movie for ratings in dataset.values() for movie in ratings})
+        movie_index = {movie: i for i, movie in enumerate(movies)}
+        rows, cols, data = [], [], []
+        for row, user in enumerate(users):
+            for movie, rating in dataset[user].items():
+                rows.append(row)
+                cols.append(movie_index[movie])
+                data.append(rating)
+        ratings = sparse.csr_matrix((data, (rows, cols)), shape=(len(users), len(movies)), dtype=np.float64)
+        return cls(users, movies, ratings)
+
+    # Convert the integer-ID arrays from ratings_io.read_ratings into the rating matrix
+    @classmethod
+    def from_ratings(cls, ratings):
+        """
+            Parameters:
+                ratings (Ratings): Ratings read by read_ratings
+            Return:
+                matrix (RatingMatrix): Return ratings of all users, the last rating wins for repeated pairs
+        """
+        keys = ratings.user_ids.astype(np.int64) * len(ratings.movies) + ratings.movie_ids
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        matrix = sparse.csr_matrix((ratings.scores[last], (ratings.user_ids[last], ratings.movie_ids[last])),
+                                   shape=(len(ratings.users), len(ratings.movies)), dtype=np.float64)
+        return cls(ratings.users, ratings.movies, matrix)
+
+    def row(self, user):
+        """
+            Parameters:
+                user (str): User name
+            Return:
+                columns, ratings (tuple): Return rated movie columns (sorted) and ratings of the user
+        """
+        if user not in self.user_index:
+            raise TypeError('Cannot find ' + user + ' in the dataset')
+        return _entries(self._ratings, self.user_index[user], self._pending_rows)
+
+    def column(self, movie):
+        """
+            Parameters:
+                movie (str): Movie title
+            Return:
+                rows, ratings (tuple): Return rows (sorted) of the users who rated the movie and their ratings
+        """
+        if movie not in self.movie_index:
+            raise TypeError('Cannot find ' + movie + ' in the dataset')
+        return _entries(self._by_movie, self.movie_index[movie], self._pending_columns)
+
+    # Sum of f(rating of user, rating of other user) over movies rated by both users, for all other users
+    def _co_rated_sums(self, user, function):
+        """
+            Parameters:
+                user (str): User to compare
+                function (callable): element-wise function of the rating differences
+            Return:
+                sums, counts (tuple): Return sums and numbers of co-rated movies for every user
+        """
+        columns, ratings = self.row(user)
+        merged = columns < self._by_movie.shape[1]
+        # only the columns of movies rated by user can be co-rated, CSC gives them without scanning all rows
+        sub = self._by_movie[:, columns[merged]]
+        entry_columns = np.repeat(np.arange(np.count_nonzero(merged)), np.diff(sub.indptr))
+        values = function(sub.data - ratings[merged][entry_columns])
+        sums = np.bincount(sub.indices, weights=values, minlength=len(self.users))
+        counts = np.bincount(sub.indices, minlength=len(self.users))
+        # ratings of the same movies by other users that are not merged yet
+        for column, rating in zip(columns.tolist(), ratings.tolist()):
+            for i, other in self._pending_columns.get(column, {}).items():
+                sums[i] += function(other - rating)
+                counts[i] += 1
+        return sums, counts
+
+    # Compute the Euclidean distance score between user and all users
+    def euclidean_scores(self, user):
+        """
+            Parameters:
+                user (str): User to compare
+            Return:
+                scores (array): Return euclidean_score(dataset, user, x) for every user x in matrix order
+        """
+        sums, counts = self._co_rated_sums(user, np.square)
+        return np.where(counts > 0, 1 / (1 + np.sqrt(sums)), 0)
+
+    # Compute the manhattan distance between user and all users
+    def manhattan_scores(self, user):
+        """
+            Parameters:
+                user (str): User to compare
+            Return:
+                scores (array): Return manhattan_score(dataset, user, x) for every user x in matrix order
+        """
+        sums, counts = self._co_rated_sums(user, np.fabs)
+        return np.where(counts > 0, sums, 0)
+
+    # Compute the Euclidean distance score between all pairs of users, block_size rows at a time
+    def all_pairs_euclidean(self, block_size=1024):
+        """
+            Parameters:
+                block_size (int): Number of users in one block of rows
+            Return:
+                blocks (generator): Return (first user number, block_size x users array of euclidean_score)
+                                    for every block of rows, the full users x users matrix is never built
+        """
+        # co-rating mask: the same sparsity structure with 1 for every rated movie (ratings may be 0)
+        mask = self.ratings.copy()
+        mask.data[:] = 1.0
+        squares = self.ratings.multiply(self.ratings).tocsr()
+        # sum over co-rated movies of (a - b)^2 = a^2 + b^2 - 2ab, every term restricted by the co-rating mask
+        for start in range(0, len(self.users), block_size):
+            rows = slice(start, start + block_size)
+            left = (squares[rows] @ mask.T).toarray()
+            right = (mask[rows] @ squares.T).toarray()
+            cross = (self.ratings[rows] @ self.ratings.T).toarray()
+            counts = (mask[rows] @ mask.T).toarray()
+            squared = np.maximum(left + right - 2 * cross, 0)
+            yield start, np.where(counts > 0, 1 / (1 + np.sqrt(squared)), 0)
+
+    # Compute the manhattan distance between all pairs of users, block_size rows at a time
+    def all_pairs_manhattan(self, block_size=1024):
+        """
+            Parameters:
+                block_size (int): Number of users in one block of rows
+            Return:
+                blocks (generator): Return (first user number, block_size x users array of manhattan_score)
+                                    for every block of rows
+        """
+        for start in range(0, len(self.users), block_size):
+            yield start, np.array([self.manhattan_scores(user) for user in self.users[start:start + block_size]])
+
+
+# Stored entries of one row of a CSR (or one column of a CSC) matrix together with the pending ones
+def _entries(matrix, major, pending):
+    """
+        Parameters:
+            matrix (csr_matrix or csc_matrix): merged ratings
+            major (int): row of a CSR matrix, column of a CSC matrix
+            pending (dict): new entries, major -> {minor: rating}
+        Return:
+            indices, ratings (tuple): Return sorted minor indices and their ratings
+    """
+    if major + 1 < len(matrix.indptr):
+        start, end = matrix.indptr[major], matrix.indptr[major + 1]
+        indices, data = matrix.indices[start:end], matrix.data[start:end]
+    else:
+        indices, data = np.zeros(0, dtype=matrix.indices.dtype), np.zeros(0)
+    new = pending.get(major)
+    if not new:
+        return indices, data
+    indices = np.concatenate([indices, np.fromiter(new.keys(), dtype=indices.dtype, count=len(new))])
+    data = np.concatenate([data, np.fromiter(new.values(), dtype=np.float64, count=len(new))])
+    order = np.argsort(indices, kind='stable')
+    return indices[order], data[order]
+
+
+# Finds users in the matrix that are similar to the input user
+def find_similar_users_matrix(matrix, user, num_users, metric='euclidean'):
+    """
+        Find similar users.
+            Parameters:
+                matrix (RatingMatrix): Ratings of all users
+                user (str): User to compare
+                num_users (int): Number of users
+                metric (str): 'euclidean' or 'manhattan'
+
+            Return:
+                scores (list): Return (user, score) pairs sorted in decreasing order of the score
+
+    """
+    scores = matrix.euclidean_scores(user) if metric == 'euclidean' else matrix.manhattan_scores(user)
+    scores[matrix.user_index[user]] = -np.inf  # skip the input user
+    top_users = np.argsort(scores)[::-1][:min(num_users, len(scores) - 1)]
+    return [(matrix.users[i], float(scores[i])) for i in top_users]
+
+
+# Dataset in the movies.json format with random ratings
+def synthetic_dataset(num_users, num_movies=2000, ratings_per_user=50, seed=0):
+    """
+            Parameters:
+                num_users (int): Number of users
+                num_movies (int): Number of movies
+                ratings_per_user (int): Number of movies rated by every user
+                seed (int): Random seed
+            Return:
+                dataset (dict): Return ratings of all users
+    """
+    rng = np.random.default_rng(seed)
+    dataset = {}
+    for u in range(num_users):
+        movies = rng.choice(num_movies, ratings_per_user, replace=False)
+        dataset['user %d' % u] = {'movie %d' % m: int(r) for m, r in zip(movies, rng.integers(1, 11, ratings_per_user))}
+    return dataset
+
+
+if __name__ == '__main__':
+
+    import argparse
+    import time
+
+    from euclidean import euclidean_score
+    from manhattan import manhattan_score
+
+    parser = argparse.ArgumentParser(description='Vectorized similarity scores against the pairwise functions')
+    parser.add_argument('--users', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    for num_users in args.users:
+        data = synthetic_dataset(num_users)
+        user = 'user 0'
+        start = time.perf_counter()
+        matrix = RatingMatrix.from_dataset(data)
+        build_time = time.perf_counter() - start
+        print('\n%d users, matrix built in %.3f s' % (num_users, build_time))
+        for name, pairwise, vectorized in (('euclidean', euclidean_score, matrix.euclidean_scores),
+                                           ('manhattan', manhattan_score, matrix.manhattan_scores)):
+            start = time.perf_counter()
+            expected = np.array([pairwise(data, user, x) for x in data])
+            loop_time = time.perf_counter() - start
+            start = time.perf_counter()
+            scores = vectorized(user)
+            matrix_time = time.perf_counter() - start
+            print('%-9s loop %.3f s, matrix %.4f s, %.0fx faster, max difference %g' % (
+                name, loop_time, matrix_time, loop_time / matrix_time, np.abs(scores - expected).max()))
@@ -0,0 +1,195 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# pip install numpy
+
+# Streaming reader of rating files into compact integer-ID arrays.
+# User names and movie titles are interned once into string tables, every rating is stored as
+# (int32 user id, int32 movie id, float32 score), so the file is never held in memory as a dict of dicts.
+#
+# Supported formats:
+#   nested JSON like movies.json            {"user": {"movie": 10, ...}, ...}
+#   line-delimited JSON (.jsonl, .ndjson)   ["user", "movie", 10]  or  {"user": ..., "movie": ..., "rating": ...}
+#   tab-separated lines (.tsv)              user<TAB>movie<TAB>10
+
+import json
+from array import array
+
+import numpy as np
+
+LINE_FORMATS = ('.jsonl', '.ndjson', '.tsv')
+
+
+# Ratings as integer-ID arrays with user and movie string tables
+class Ratings:
+
+    def __init__(self, users, movies, user_ids, movie_ids, scores):
+        """
+            Parameters:
+                users (list): user names, user id is the position in the list
+                movies (list): movie titles, movie id is the position in the list
+                user_ids (array): int32 user id of every rating
+                movie_ids (array): int32 movie id of every rating
+                scores (array): float32 score of every rating
+        """
+        self.users = users
+        self.movies = movies
+        self.user_ids = user_ids
+        self.movie_ids = movie_ids
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.scores)
+
+    # Convert into the dict of dicts dataset used by euclidean_score and manhattan_score
+    def to_dataset(self):
+        """
+            Return:
+                dataset (dict): Return ratings of all users, in the order of the file
+        """
+        dataset = {user: {} for user in self.users}
+        for u, m, score in zip(self.user_ids.tolist(), self.movie_ids.tolist(), self.scores.tolist()):
+            dataset[self.users[u]][self.movies[m]] = int(score) if score.is_integer() else score
+        return dataset
+
+
+# Collects ratings into growing typed arrays, strings are interned into id tables
+class _Builder:
+
+    def __init__(self):
+        self.users, self.movies = [], []
+        self.user_index, self.movie_index = {}, {}
+        self.user_ids, self.movie_ids, self.scores = array('i'), array('i'), array('f')
+
+    def _intern(self, name, names, index):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names)
+            names.append(name)
+        return i
+
+    def user(self, user):
+        return self._intern(user, self.users, self.user_index)
+
+    def add(self, user_id, movie, score):
+        self.user_ids.append(user_id)
+        self.movie_ids.append(self._intern(movie, self.movies, self.movie_index))
+        self.scores.append(score)
+
+    def ratings(self):
+        return Ratings(self.users, self.movies, np.frombuffer(self.user_ids, dtype=np.int32),
+                       np.frombuffer(self.movie_ids, dtype=np.int32), np.frombuffer(self.scores, dtype=np.float32))
+
+
+# Text file read in chunks, JSON values are decoded from the buffer one by one
+class _JSONStream:
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return bool(chunk)
+
+    # Next character that is not a whitespace, '' at the end of the file
+    def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, characters):
+        c = self.peek()
+        if not c or c not in characters:
+            raise ValueError('Expected %r at character %d, found %r' % (characters, self.position, c))
+        self.position += 1
+        return c
+
+    # Next string or object, only values with a closing character, so a value cut by the chunk end is an error
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                result, self.position = self.decoder.raw_decode(self.buffer, self.position)
+                return result
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+
+def _read_nested(f, builder, chunk_size):
+    stream = _JSONStream(f, chunk_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        user = builder.user(stream.value())
+        stream.expect(':')
+        for movie, score in stream.value().items():  # one user at a time is in memory
+            builder.add(user, movie, score)
+        if stream.expect(',}') == '}':
+            return
+
+
+def _read_lines(f, builder):
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] == '[':
+            user, movie, score = json.loads(line)
+        elif line[0] == '{':
+            record = json.loads(line)
+            user, movie, score = record['user'], record['movie'], record['rating']
+        else:
+            user, movie, score = line.split('\t')
+            score = float(score)
+        builder.add(builder.user(user), movie, score)
+
+
+# Read ratings from a nested JSON or a line-delimited file
+def read_ratings(path, file_format=None, chunk_size=1 << 20):
+    """
+            Parameters:
+                path (str): Path to the rating file
+                file_format (str): 'nested' or 'lines', by default chosen by the file extension
+                chunk_size (int): Number of characters read at once from a nested JSON file
+            Return:
+                ratings (Ratings): Return ratings as integer-ID arrays
+    """
+    if file_format is None:
+        file_format = 'lines' if path.lower().endswith(LINE_FORMATS) else 'nested'
+    builder = _Builder()
+    with open(path, 'r', encoding="UTF-8") as f:
+        if file_format == 'nested':
+            _read_nested(f, builder, chunk_size)
+        elif file_format == 'lines':
+            _read_lines(f, builder)
+        else:
+            raise ValueError('Unknown rating file format ' + file_format)
+    return builder.ratings()
+
+
+if __name__ == '__main__':
+
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Streaming read of a rating file')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['nested', 'lines'])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ratings = read_ratings(args.path, args.format)
+    elapsed = time.perf_counter() - start
+    size = ratings.user_ids.nbytes + ratings.movie_ids.nbytes + ratings.scores.nbytes
+    print('%d ratings, %d users, %d movies in %.3f s (%.0f ratings/s), %.1f MB of arrays' % (
+        len(ratings), len(ratings.users), len(ratings.movies), elapsed, len(ratings) / elapsed, size / 1e6))
@@ -9,12 +9,13 @@
 
 # movie recommendation engine based on two counting methods : manhattan and euclidean
 
-import json
 import numpy as np
-from imdb import Cinemagoer
 
 from euclidean import euclidean_score
 from manhattan import manhattan_score
+from movie_metadata import CinemagoerProvider, MetadataCache, MovieMetadata, StubProvider
+from rating_matrix import RatingMatrix, find_similar_users_matrix
+from ratings_io import read_ratings
 
 
 # Finds users in the dataset that are similar to the input user
@@ -56,57 +57,75 @@ def find_similar_users(dataset, user, num_users):
 # Print recommended movies in console
 def print_recommended_movies():
     print('\nRecommended movies : ')
+    # metadata of all titles at once: cached ones from disk, the rest fetched concurrently
+    movies = metadata.get_many(recommended_movies)
     for i in recommended_movies:
         print('* ' + i)
-        movies = ia.search_movie(i)
-        movie = ia.get_movie(movies[0].movieID)
-        print(' - year: ' + str(movie['year']))
+        movie = movies[i]
+        if movie is None:
+            print(' - no data')
+            continue
+        if movie['year'] is not None:
+            print(' - year: ' + str(movie['year']))
+        else:
+            print(' - year: no data')
 
-        if 'rating' in movie:
+        if movie['rating'] is not None:
             print(' - rating: ' + str(movie['rating']))
         else:
             print(' - rating: no data')
 
-        if 'votes' in movie:
+        if movie['votes'] is not None:
             print(' - votes: ' + str(movie['votes']))
         else:
             print(' - votes: no data')
 
-
         box_office = ''
-        if 'box office' in movie:
-            box_office = movie['box office']['Budget']
+        if movie['budget'] is not None:
+            box_office = str(movie['budget'])
         else:
             box_office = ' no data '
         print(' - box office: ' + box_office)
 
-        if 'director' in movie:
+        if movie['directors']:
             for director in movie['directors']:
-                print(' - director: ' + director['name'])
+                print(' - director: ' + director)
         else:
             print(' - director: no data')
 
 
 if __name__ == '__main__':
 
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Movie recommendations')
+    parser.add_argument('--cache', default='metadata.sqlite', help='SQLite cache of movie metadata')
+    parser.add_argument('--stub', help='JSON file with movie metadata used instead of IMDB')
+    parser.add_argument('--ratings', default='movies.json', help='nested JSON or line-delimited rating file')
+    args = parser.parse_args()
+
     user = 'Kamil Kornatowski'
 
-    ratings_file = 'movies.json'
+    ratings_file = args.ratings
 
-    # Create connection to IMDB API
-    ia = Cinemagoer()
+    # Movie metadata from IMDB API (or a local file), cached on disk
+    provider = StubProvider(args.stub) if args.stub else CinemagoerProvider()
+    metadata = MovieMetadata(provider, MetadataCache(args.cache))
 
-    with open(ratings_file, 'r', encoding="UTF-8") as f:
-        data = json.loads(f.read())
-    similar_users = find_similar_users(data, user, 12)
+    # streaming read into integer-ID arrays, then a sparse users x movies matrix (no dict of dicts)
+    ratings = read_ratings(ratings_file)
+    matrix = RatingMatrix.from_ratings(ratings)
+    similar_users = find_similar_users_matrix(matrix, user, 12)
 
-    best_match_movies = data[similar_users[0][0]]
-    user_movies = data[user]
+    best_match = matrix.user_index[similar_users[0][0]]
+    best_match_movies = dict(zip(*(values.tolist() for values in matrix.row(similar_users[0][0]))))
+    user_movies = set(matrix.row(user)[0].tolist())
     diff_dict = {}
 
-    for key in best_match_movies.keys():
-        if key not in user_movies.keys():
-            diff_dict[key] = best_match_movies[key]
+    # movies in the order of the rating file, like the keys of the JSON object
+    for column in dict.fromkeys(ratings.movie_ids[ratings.user_ids == best_match].tolist()):
+        if column not in user_movies:
+            diff_dict[matrix.movies[column]] = best_match_movies[column]
 
     # Sorting dict by values
     diff_dict = {k: v for k, v in sorted(diff_dict.items(), key=lambda item: item[1], reverse=True)}
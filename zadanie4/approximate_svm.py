@@ -0,0 +1,200 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+"""
+To run program install
+pip install numpy
+pip install pandas
+pip install sklearn
+
+Approximate kernel SVM for large wine datasets.
+
+svm.SVC solves the exact kernel problem, its training time grows faster than quadratically with the number
+of samples. Here the rbf kernel is approximated by random Fourier features (RBFSampler) or, for any kernel,
+by the Nystroem method, and a linear SVM (SGDClassifier with hinge loss) is trained on the mapped features
+by partial_fit, one chunk at a time. The scaler and the feature map are fitted on the first chunk,
+so the CSV is never read into memory as a whole.
+
+The benchmark compares accuracy and training time with svm.SVC on growing datasets made from
+winequality-white.csv (rows resampled with a small noise). Every training set is written to a CSV file first
+and ApproximateSVM is trained from it by fit_csv, the out-of-core path, so its time includes reading the chunks. The wine rows are split into training and test rows
+first, so no test sample is a noisy copy of a training row.
+
+Usage:
+    python approximate_svm.py --sizes 1000 10000 50000 --components 500
+    python approximate_svm.py --train big_wines.csv --chunk-size 100000 --epochs 3
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn import svm
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from model_cache import FEATURES
+
+QUALITIES = np.arange(11)  # quality scale of the wines, partial_fit needs all classes in advance
+
+
+class ApproximateSVM:
+
+    def __init__(self, kernel="rbf", method="fourier", components=500, gamma=None, degree=3, alpha=1e-4,
+                 classes=QUALITIES, random_state=0):
+        """
+        Parameters:
+            kernel (str): kernel type, only "rbf" for the fourier method
+            method (str): "fourier" (random Fourier features) or "nystroem"
+            components (int): dimension of the approximate feature space
+            gamma (float): kernel coefficient, 1 / number of features (the scaled "scale" of svm.SVC) if not given
+            degree (int): degree of the poly kernel
+            alpha (float): regularization of the linear SVM
+            classes (array): all labels, fewer classes train faster (one binary SVM per class)
+            random_state (int): random seed
+        """
+        gamma = gamma or 1. / len(FEATURES)
+        if method == "fourier":
+            if kernel != "rbf":
+                raise ValueError("Random Fourier features approximate only the rbf kernel, use method='nystroem'")
+            feature_map = RBFSampler(gamma=gamma, n_components=components, random_state=random_state)
+        elif method == "nystroem":
+            feature_map = Nystroem(kernel=kernel, gamma=gamma, degree=degree, n_components=components,
+                                   random_state=random_state)
+        else:
+            raise ValueError("Unknown method " + method)
+        self.scaler = StandardScaler()
+        self.feature_map = feature_map
+        self.classifier = SGDClassifier(loss="hinge", alpha=alpha, random_state=random_state)
+        self.classes = classes
+        self.fitted = False
+
+    def _start(self, X):
+        # scaler and feature map are fitted on the first chunk only
+        self.scaler.fit(X)
+        self.feature_map.fit(self.scaler.transform(X))
+        self.fitted = True
+
+    def transform(self, X):
+        # float32 features halve the cost of the feature map
+        return self.feature_map.transform(self.scaler.transform(np.asarray(X, dtype=np.float32)))
+
+    def partial_fit(self, X, y):
+        """
+        One pass of the linear SVM over a chunk
+        """
+        if not self.fitted:
+            self._start(X)
+        self.classifier.partial_fit(self.transform(X), y, classes=self.classes)
+        return self
+
+    def fit(self, X, y, batch_size=10000, epochs=3):
+        """
+        Train on data in memory, in shuffled mini-batches
+        """
+        rng = np.random.default_rng(0)
+        for _ in range(epochs):
+            order = rng.permutation(len(X))
+            for start in range(0, len(X), batch_size):
+                batch = order[start:start + batch_size]
+                self.partial_fit(X[batch], y[batch])
+        return self
+
+    def fit_csv(self, path, chunk_size=100000, epochs=3):
+        """
+        Train out of core on a ';' delimited CSV in the winequality-white.csv format, read in chunks
+        """
+        for _ in range(epochs):
+            for chunk in pd.read_csv(path, delimiter=';', header=None, chunksize=chunk_size):
+                values = chunk.to_numpy(dtype=float)
+                self.partial_fit(values[:, :len(FEATURES)], values[:, len(FEATURES)].astype(int))
+        return self
+
+    def predict(self, X):
+        return self.classifier.predict(self.transform(X))
+
+    def score(self, X, y):
+        return np.mean(self.predict(X) == y)
+
+
+def synthetic_wines(X, y, size, noise=0.05, seed=0):
+    """
+    Bigger dataset from the wine samples: random rows with a gaussian noise of noise * standard deviation
+    Returns:
+        tuple: features and labels
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(len(X), size=size)
+    return X[rows] + rng.normal(0, noise, (size, X.shape[1])) * X.std(axis=0), y[rows]
+
+
+def benchmark(X, y, sizes, svc_limit=50000, test_size=0.2, chunk_size=100000, epochs=3, **params):
+    """
+    Training time and test accuracy of svm.SVC and ApproximateSVM (trained from a CSV by fit_csv)
+    for every dataset size
+    Parameters:
+        X (array): features of the wine samples
+        y (array): labels
+        sizes (list): numbers of training samples
+        svc_limit (int): svm.SVC is skipped for bigger datasets
+        test_size (float): share of the wine samples the test set is made from
+        chunk_size (int): rows of one CSV chunk of fit_csv
+        epochs (int): passes of fit_csv over the CSV
+        params: ApproximateSVM parameters
+    """
+    # disjoint wine rows for the test and training sets, resampled separately
+    order = np.random.default_rng(1).permutation(len(X))
+    split = max(1, int(test_size * len(X)))
+    test_rows, train_rows = order[:split], order[split:]
+    X_test, y_test = synthetic_wines(X[test_rows], y[test_rows], 10000, seed=1)
+    print("{:>9} {:>12} {:>10} {:>12} {:>10}".format("samples", "SVC fit [s]", "accuracy", "approx [s]", "accuracy"))
+    for size in sizes:
+        X_train, y_train = synthetic_wines(X[train_rows], y[train_rows], size)
+        exact_time = exact_accuracy = float("nan")
+        if size <= svc_limit:
+            start = time.perf_counter()
+            exact = Pipeline([("scale", StandardScaler()), ("svc", svm.SVC(kernel=params.get("kernel", "rbf")))])
+            exact.fit(X_train, y_train)
+            exact_time = time.perf_counter() - start
+            exact_accuracy = exact.score(X_test, y_test)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "wines.csv")
+            pd.DataFrame(np.column_stack([X_train, y_train])).to_csv(path, sep=';', header=False, index=False)
+            start = time.perf_counter()
+            approximate = ApproximateSVM(classes=np.unique(y), **params).fit_csv(path, chunk_size, epochs)
+            approximate_time = time.perf_counter() - start
+        print("{:>9} {:>12.2f} {:>10.3f} {:>12.2f} {:>10.3f}".format(
+            size, exact_time, exact_accuracy, approximate_time, approximate.score(X_test, y_test)))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Approximate kernel SVM against svm.SVC')
+    parser.add_argument('--data', default='winequality-white.csv')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000, 100000])
+    parser.add_argument('--svc-limit', type=int, default=50000, help='largest dataset trained with svm.SVC')
+    parser.add_argument('--kernel', default='rbf', choices=['rbf', 'poly', 'sigmoid'])
+    parser.add_argument('--method', default='fourier', choices=['fourier', 'nystroem'])
+    parser.add_argument('--components', type=int, default=500)
+    parser.add_argument('--train', help='train out of core on this CSV instead of the benchmark')
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--epochs', type=int, default=3)
+    args = parser.parse_args()
+    if args.method == 'fourier' and args.kernel != 'rbf':
+        parser.error("random Fourier features approximate only the rbf kernel, use --method nystroem")
+
+    params = {"kernel": args.kernel, "method": args.method, "components": args.components}
+    data = pd.read_csv(args.data, delimiter=';', names=FEATURES + ["quality"])
+    X, y = data[FEATURES].to_numpy(dtype=float), data["quality"].to_numpy()
+    if args.train:
+        start = time.perf_counter()
+        model = ApproximateSVM(**params).fit_csv(args.train, args.chunk_size, args.epochs)
+        print("Trained on {} in {:.2f} s, accuracy on {}: {:.3f}".format(args.train, time.perf_counter() - start,
+                                                                         args.data, model.score(X, y)))
+    else:
+        benchmark(X, y, args.sizes, args.svc_limit, chunk_size=args.chunk_size, epochs=args.epochs, **params)
@@ -0,0 +1,75 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+"""
+To run program install
+pip install numpy
+pip install pandas
+
+Binary cache of the parsed wine dataset.
+
+The CSV is parsed with pandas only once, the columns are saved as one float32 .npy array of shape
+(columns, rows), so every column is a contiguous block. Later runs map the file into memory (np.load with
+mmap_mode) instead of parsing the CSV. The file name contains the hash of the CSV contents,
+so a changed CSV is parsed and cached again.
+
+Usage:
+    python dataset_cache.py --data winequality-white.csv
+"""
+
+import glob
+import os
+
+import numpy as np
+
+from model_cache import file_hash
+
+
+def cache_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def cache_path(path, cache_dir):
+    return os.path.join(cache_dir, '{}-{}.npy'.format(cache_name(path), file_hash(path)[:16]))
+
+
+def load_columns(path, cache_dir='dataset_cache'):
+    """
+    Columns of a ';' delimited CSV without header, from the binary cache when it is up to date
+    Parameters:
+        path (str): CSV file
+        cache_dir (str): directory of the cache, created when needed
+    Returns:
+        array: read-only memory-mapped float32 array of shape (columns, rows)
+    """
+    cached = cache_path(path, cache_dir)
+    if not os.path.exists(cached):
+        import pandas as pd
+
+        columns = pd.read_csv(path, delimiter=';', header=None).to_numpy(dtype=np.float32).T
+        os.makedirs(cache_dir, exist_ok=True)
+        # cache of an older version of the same CSV, not of other CSVs whose names start with the same words
+        versions = glob.escape(cache_name(path)) + '-' + '[0-9a-f]' * 16 + '.npy'
+        for old in glob.glob(os.path.join(glob.escape(cache_dir), versions)):
+            os.remove(old)
+        np.save(cached + '.tmp.npy', np.ascontiguousarray(columns))
+        os.replace(cached + '.tmp.npy', cached)
+    return np.load(cached, mmap_mode='r')
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Parse time of the CSV against the memory-mapped cache')
+    parser.add_argument('--data', default='winequality-white.csv')
+    parser.add_argument('--cache', default='dataset_cache')
+    args = parser.parse_args()
+
+    for old in glob.glob(os.path.join(args.cache, '*.npy')):
+        os.remove(old)
+    for start_type in ('CSV parse', 'Cached'):
+        start = time.perf_counter()
+        columns = load_columns(args.data, args.cache)
+        print('{}: {} columns x {} rows in {:.4f} s'.format(start_type, columns.shape[0], columns.shape[1],
+                                                            time.perf_counter() - start))
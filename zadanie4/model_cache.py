@@ -0,0 +1,144 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+"""
+To run program install
+pip install numpy
+pip install pandas
+pip install sklearn
+
+Cache of trained models on disk.
+
+A model is saved (joblib) under a key built from the SHA-256 of the CSV file contents, the feature list,
+the dtype of the features, the model hyperparameters and the sklearn version. The next run loads the model
+with the same key instead of training it again, a change of any of these inputs gives a new key, so the model
+is trained again.
+
+Usage (cold start with an empty cache, then warm start):
+    python model_cache.py --data winequality-white.csv --cache model_cache
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn import svm
+
+KERNELS = ["linear", "poly", "rbf", "sigmoid"]
+FEATURES = ["fixed acidity", "volatile acidity", "citric acid", "residual sugar", "chlorides",
+            "free sulfur dioxide", "total sulfur dioxide", "density", "pH", "sulphates", "alcohol"]
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    SHA-256 of the file contents, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_key(data_hash, features, model, dtype):
+    """
+    Key of a model trained on the given data and features
+    Parameters:
+        data_hash (str): hash of the CSV file contents
+        features (list): names of the feature columns, in order
+        model: unfitted sklearn estimator, its hyperparameters are part of the key
+        dtype: dtype of the features, float32 and float64 data give slightly different models
+    Returns:
+        str: hexadecimal key
+    """
+    description = json.dumps({'data': data_hash, 'features': list(features), 'dtype': str(np.dtype(dtype)),
+                              'model': type(model).__name__, 'params': model.get_params(),
+                              'sklearn': sklearn.__version__},
+                             sort_keys=True, default=str)
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+class ModelCache:
+
+    def __init__(self, directory='model_cache'):
+        """
+        Parameters:
+            directory (str): directory with the saved models, created when needed
+        """
+        self.directory = directory
+
+    def path(self, name, key):
+        return os.path.join(self.directory, '{}-{}.joblib'.format(name, key[:16]))
+
+    def load_or_fit(self, name, key, model, X, y):
+        """
+        Load the model saved under the key or fit it and save it
+        Parameters:
+            name (str): readable model name, part of the file name
+            key (str): key from model_key
+            model: unfitted sklearn estimator
+            X (array): features
+            y (array): labels
+        Returns:
+            tuple: fitted model, True if it was loaded from the cache, seconds spent
+        """
+        start = time.perf_counter()
+        path = self.path(name, key)
+        if os.path.exists(path):
+            return joblib.load(path), True, time.perf_counter() - start
+        model.fit(X, y)
+        os.makedirs(self.directory, exist_ok=True)
+        joblib.dump(model, path + '.tmp')
+        os.replace(path + '.tmp', path)  # a run stopped while saving does not leave a broken model
+        return model, False, time.perf_counter() - start
+
+
+def svm_models(data_path, X, y, features, kernels=KERNELS, cache=None, verbose=True):
+    """
+    svm.SVC models with the given kernels, loaded from the cache or trained
+    Parameters:
+        data_path (str): CSV file the data was read from
+        X (array): features
+        y (array): labels
+        features (list): names of the feature columns
+        kernels (list): kernel types
+        cache (ModelCache): model cache, the default directory if not given
+        verbose (bool): print for every model if it was loaded or trained and how long it took
+    Returns:
+        dict: kernel -> fitted svm.SVC
+    """
+    cache = cache or ModelCache()
+    data_hash = file_hash(data_path)
+    dtype = np.asarray(X).dtype
+    models = {}
+    for kernel in kernels:
+        model = svm.SVC(kernel=kernel)
+        models[kernel], cached, seconds = cache.load_or_fit(kernel, model_key(data_hash, features, model, dtype),
+                                                            model, X, y)
+        if verbose:
+            print("{} kernel: {} in {:.3f} s".format(kernel, "loaded from cache" if cached else "trained", seconds))
+    return models
+
+
+if __name__ == '__main__':
+    import argparse
+    import shutil
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Cold and warm startup time of the SVM models')
+    parser.add_argument('--data', default='winequality-white.csv')
+    parser.add_argument('--cache', default='model_cache')
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, delimiter=';', names=FEATURES + ["quality"])
+
+    shutil.rmtree(args.cache, ignore_errors=True)
+    for start_type in ('Cold', 'Warm'):
+        start = time.perf_counter()
+        svm_models(args.data, data[FEATURES].values, data['quality'], FEATURES, cache=ModelCache(args.cache))
+        print('{} startup: {:.3f} s\n'.format(start_type, time.perf_counter() - start))
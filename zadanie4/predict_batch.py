@@ -0,0 +1,73 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+"""
+To run program install
+pip install pandas
+pip install sklearn
+
+Batch prediction of white wine quality.
+
+The input CSV has the format of winequality-white.csv (';' delimited, no header, the 11 chemical measures,
+the quality column may be there or not). It is read in chunks of fixed size, every selected kernel predicts
+the whole chunk with one predict call and the chunk is appended to the output file at once,
+so the memory used does not depend on the file size.
+The models are trained on winequality-white.csv, or loaded from model_cache when they were trained before.
+
+Output columns: the 11 measures, then the predicted quality of every selected kernel.
+
+Usage:
+    python predict_batch.py wines.csv --output predictions.csv --kernels rbf linear --chunk-size 50000
+"""
+
+import csv
+import time
+
+import pandas as pd
+
+from model_cache import FEATURES, KERNELS, svm_models
+
+
+def predict_file(models, input_path, output_path, chunk_size=10000):
+    """
+    Predict the quality of every wine of the input CSV, chunk by chunk
+    Parameters:
+        models (dict): kernel -> fitted model
+        input_path (str): ';' delimited CSV without header
+        output_path (str): ';' delimited CSV written with a header
+        chunk_size (int): number of rows read and predicted at once
+    Returns:
+        int: number of predicted rows
+    """
+    rows = 0
+    with open(output_path, 'w', encoding="UTF-8", newline='') as output:
+        writer = csv.writer(output, delimiter=';', lineterminator='\n')  # the same line ending as to_csv
+        writer.writerow(FEATURES + ["{} quality".format(kernel) for kernel in models])
+        for chunk in pd.read_csv(input_path, delimiter=';', header=None, chunksize=chunk_size):
+            X = chunk.iloc[:, :len(FEATURES)].to_numpy(dtype=float)
+            result = pd.DataFrame(X, columns=FEATURES)
+            for kernel, model in models.items():
+                result["{} quality".format(kernel)] = model.predict(X)
+            result.to_csv(output, sep=';', header=False, index=False)
+            rows += len(X)
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Batch prediction of white wine quality')
+    parser.add_argument('input', help="';' delimited CSV in the winequality-white.csv format")
+    parser.add_argument('--output', default='predictions.csv')
+    parser.add_argument('--kernels', nargs='+', default=KERNELS, choices=KERNELS)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--data', default='winequality-white.csv', help='training data')
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, delimiter=';', names=FEATURES + ["quality"])
+    models = svm_models(args.data, data[FEATURES].values, data['quality'], FEATURES, args.kernels)
+
+    start = time.perf_counter()
+    rows = predict_file(models, args.input, args.output, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print("{} rows in {:.2f} s, {:,.0f} rows/s, saved to {}".format(rows, elapsed, rows / elapsed, args.output))
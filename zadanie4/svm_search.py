@@ -0,0 +1,190 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+"""
+To run program install
+pip install pandas
+pip install sklearn
+
+Hyperparameter search for the wine SVM kernels.
+
+Every model is a pipeline of StandardScaler and svm.SVC, so C and gamma work on features with the same scale.
+All configurations (kernel, C, gamma, degree) are evaluated by k-fold cross validation, the fits of all
+configurations and folds run in parallel on a process pool (grid search or successive halving, which
+drops the worst configurations early and gives more samples only to the best ones).
+The report lists accuracy and fit / predict times of every configuration, the fastest configuration
+reaching the accuracy target can be trained for all kernels at once, also in parallel.
+
+Usage:
+    python svm_search.py --data winequality-white.csv --folds 5 --target 0.5
+    python svm_search.py --halving --jobs 4
+"""
+
+import time
+
+from joblib import Parallel, delayed
+from sklearn import svm
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401, enables HalvingGridSearchCV
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, KFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from model_cache import FEATURES, KERNELS
+
+C_VALUES = [0.1, 1, 10, 100]
+GAMMA_VALUES = ['scale', 0.01, 0.1, 1]
+DEGREES = [2, 3, 4]
+
+
+def pipeline(kernel="rbf", **params):
+    """
+    Standardization followed by svm.SVC
+    Parameters:
+        kernel (str): kernel type
+        params: other svm.SVC parameters
+    Returns:
+        Pipeline: unfitted model
+    """
+    return Pipeline([("scale", StandardScaler()), ("svc", svm.SVC(kernel=kernel, **params))])
+
+
+def param_grid(kernels=KERNELS):
+    """
+    Grid of C, gamma and degree, only the parameters used by a kernel are searched for it
+    Returns:
+        list: one grid per kernel, in the GridSearchCV format
+    """
+    grids = []
+    for kernel in kernels:
+        grid = {"svc__kernel": [kernel], "svc__C": C_VALUES}
+        if kernel != "linear":
+            grid["svc__gamma"] = GAMMA_VALUES
+        if kernel == "poly":
+            grid["svc__degree"] = DEGREES
+        grids.append(grid)
+    return grids
+
+
+def search(X, y, kernels=KERNELS, folds=5, halving=False, jobs=-1):
+    """
+    Cross validated search over all kernels and their hyperparameters
+    Parameters:
+        X (array): features
+        y (array): labels
+        kernels (list): kernel types
+        folds (int): number of cross validation folds
+        halving (bool): successive halving instead of the full grid
+        jobs (int): number of worker processes, -1 for all CPU cores
+    Returns:
+        list: report rows (dict) sorted by decreasing accuracy
+    """
+    cv = KFold(folds, shuffle=True, random_state=0)  # some quality classes have fewer samples than folds
+    if halving:
+        searcher = HalvingGridSearchCV(pipeline(), param_grid(kernels), cv=cv, n_jobs=jobs, random_state=0)
+    else:
+        searcher = GridSearchCV(pipeline(), param_grid(kernels), cv=cv, n_jobs=jobs)
+    searcher.fit(X, y)
+    results = searcher.cv_results_
+    # successive halving evaluates a configuration once per round, only its last round is reported
+    last = {}
+    for i, params in enumerate(results["params"]):
+        last[tuple(sorted(params.items(), key=lambda item: item[0]))] = i
+    report = [{"kernel": results["params"][i]["svc__kernel"],
+               "params": {name[5:]: value for name, value in results["params"][i].items() if name != "svc__kernel"},
+               "accuracy": results["mean_test_score"][i], "std": results["std_test_score"][i],
+               "fit_time": results["mean_fit_time"][i], "predict_time": results["mean_score_time"][i],
+               "samples": results["n_resources"][i] if halving else len(y)}
+              for i in last.values()]
+    return sorted(report, key=lambda row: -row["accuracy"])
+
+
+def last_round(report):
+    """
+    Configurations evaluated on the most samples. After successive halving the configurations dropped
+    in earlier rounds have times and accuracies measured on fewer samples, they are left out.
+    Returns:
+        list: report rows of the last round, in the report order
+    """
+    samples = max((row["samples"] for row in report), default=0)
+    return [row for row in report if row["samples"] == samples]
+
+
+def fastest(report, target):
+    """
+    Fastest configuration (fit and predict time) of the last round with accuracy at least target
+    Returns:
+        dict: report row or None when no configuration reaches the target
+    """
+    good = [row for row in last_round(report) if row["accuracy"] >= target]
+    return min(good, key=lambda row: row["fit_time"] + row["predict_time"]) if good else None
+
+
+def best_per_kernel(report):
+    """
+    Returns:
+        dict: kernel -> most accurate report row of this kernel in the last round, kernels dropped
+              by successive halving in earlier rounds are missing
+    """
+    best = {}
+    for row in last_round(report):
+        best.setdefault(row["kernel"], row)
+    return best
+
+
+def fit_kernels(X, y, configurations, jobs=-1):
+    """
+    Train the models of several kernels concurrently on a process pool
+    Parameters:
+        X (array): features
+        y (array): labels
+        configurations (dict): kernel -> svm.SVC parameters
+        jobs (int): number of worker processes, -1 for all CPU cores
+    Returns:
+        dict: kernel -> fitted pipeline
+    """
+    models = Parallel(n_jobs=jobs)(delayed(pipeline(kernel, **params).fit)(X, y)
+                                   for kernel, params in configurations.items())
+    return dict(zip(configurations, models))
+
+
+def print_report(report):
+    print("{:<8} {:<40} {:>8} {:>7} {:>9} {:>11} {:>8}".format("kernel", "parameters", "accuracy", "std",
+                                                                "fit [ms]", "predict [ms]", "samples"))
+    for row in report:
+        print("{:<8} {:<40} {:>8.3f} {:>7.3f} {:>9.2f} {:>11.2f} {:>8}".format(
+            row["kernel"], str(row["params"]), row["accuracy"], row["std"], 1000 * row["fit_time"],
+            1000 * row["predict_time"], row["samples"]))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Cross validated hyperparameter search for the wine SVM kernels')
+    parser.add_argument('--data', default='winequality-white.csv')
+    parser.add_argument('--kernels', nargs='+', default=KERNELS, choices=KERNELS)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--halving', action='store_true', help='successive halving instead of the full grid')
+    parser.add_argument('--jobs', type=int, default=-1, help='number of worker processes, -1 for all CPU cores')
+    parser.add_argument('--target', type=float, default=0.5, help='accuracy the chosen model has to reach')
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.data, delimiter=';', names=FEATURES + ["quality"])
+    X, y = data[FEATURES].values, data['quality'].values
+
+    start = time.perf_counter()
+    report = search(X, y, args.kernels, args.folds, args.halving, args.jobs)
+    print("Search of {} configurations in {:.2f} s\n".format(len(report), time.perf_counter() - start))
+    print_report(report)
+
+    choice = fastest(report, args.target)
+    if choice is None:
+        print("\nNo configuration reaches accuracy {}".format(args.target))
+    else:
+        print("\nFastest configuration with accuracy >= {}: {} {} (accuracy {:.3f})".format(
+            args.target, choice["kernel"], choice["params"], choice["accuracy"]))
+
+    start = time.perf_counter()
+    fit_kernels(X, y, {kernel: row["params"] for kernel, row in best_per_kernel(report).items()}, args.jobs)
+    print("Best configuration of every kernel trained in parallel in {:.2f} s".format(time.perf_counter() - start))
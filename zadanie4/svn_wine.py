@@ -29,37 +29,54 @@ Data reference {x}:
 Data {y}:
 - Quality
 
+Run without plots (seaborn and matplotlib are not even imported):
+python svn_wine.py --headless
+
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn import svm
+import time
+
+start_time = time.perf_counter()  # import to first prediction time, the imports below load numpy and sklearn
+
+import argparse  # noqa: E402
+
+from dataset_cache import load_columns  # noqa: E402
+from model_cache import svm_models  # noqa: E402
+
+parser = argparse.ArgumentParser(description='Predicting the quality of white wines')
+parser.add_argument('--headless', action='store_true', help='skip the plots and the data correlation')
+args = parser.parse_args()
 
-# parsing csv file data
+# parsing csv file data, the parsed columns are memory-mapped from dataset_cache until the CSV changes
 args_x = ["fixed acidity", "volatile acidity", "citric acid", "residual sugar", "chlorides",
           "free sulfur dioxide", "total sulfur dioxide", "density", "pH", "sulphates", "alcohol"]
 
-data = pd.read_csv('winequality-white.csv', delimiter=';',
-                   names=["fixed acidity", "volatile acidity", "citric acid", "residual sugar", "chlorides",
-                          "free sulfur dioxide", "total sulfur dioxide", "density", "pH", "sulphates", "alcohol",
-                          "quality"])
-data.head()
+columns = load_columns('winequality-white.csv')
 
-sns.pairplot(data, x_vars=args_x, y_vars=['quality'], kind="reg")
+if not args.headless:
+    # plotting stack is loaded only when the plots are drawn
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-plt.show()
-print('Data correlation')
-print(data.corr())
+    data = pd.DataFrame(columns.T, columns=args_x + ["quality"])
+    data.head()
 
-X = data[args_x]
-y = data['quality']
+    sns.pairplot(data, x_vars=args_x, y_vars=['quality'], kind="reg")
 
-# Fit the SVM model with different kernel types
-svc_linear = svm.SVC(kernel="linear").fit(X.values, y)
-svc_poly = svm.SVC(kernel="poly").fit(X.values, y)
-svc_rbf = svm.SVC(kernel="rbf").fit(X.values, y)
-svc_sigmoid = svm.SVC(kernel="sigmoid").fit(X.values, y)
+    plt.show()
+    print('Data correlation')
+    print(data.corr())
+
+X = columns[:len(args_x)].T
+y = columns[len(args_x)].astype(int)
+
+# Fit the SVM model with different kernel types, models trained on the same data are loaded from model_cache
+models = svm_models('winequality-white.csv', X, y, args_x)
+svc_linear = models["linear"]
+svc_poly = models["poly"]
+svc_rbf = models["rbf"]
+svc_sigmoid = models["sigmoid"]
 
 fixed_acidity = 6.2
 volatile_acidity = 0.45
@@ -87,9 +104,11 @@ print(f"Quality of white wine with given chemical measures \n"
       f" * alcohol = {alcohol},\n"
       f"is equal : \n")
 
-print(f"Linear kernel type: ",
-      svc_linear.predict([[fixed_acidity, volatile_acidity, citric_acid, residual_sugar, chlorides,
-                           free_sulfur_dioxide, total_sulfur_dioxide, density, pH, sulphates, alcohol]]))
+linear_prediction = svc_linear.predict([[fixed_acidity, volatile_acidity, citric_acid, residual_sugar, chlorides,
+                                         free_sulfur_dioxide, total_sulfur_dioxide, density, pH, sulphates, alcohol]])
+first_prediction_time = time.perf_counter() - start_time
+
+print("Linear kernel type: ", linear_prediction)
 print("Poly kernel type: ",
       svc_poly.predict([[fixed_acidity, volatile_acidity, citric_acid, residual_sugar, chlorides,
                          free_sulfur_dioxide, total_sulfur_dioxide, density, pH, sulphates,
@@ -100,4 +119,6 @@ print("Rbf kernel type: ",
                         alcohol]]))
 print("Sigmoid kernel type: ",
       svc_sigmoid.predict([[fixed_acidity, volatile_acidity, citric_acid, residual_sugar, chlorides,
-                            free_sulfur_dioxide, total_sulfur_dioxide, density, pH, sulphates, alcohol]]))
\ No newline at end of file
+                            free_sulfur_dioxide, total_sulfur_dioxide, density, pH, sulphates, alcohol]]))
+
+print(f"\nImport to first prediction: {first_prediction_time:.3f} s")
@@ -0,0 +1,203 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# Headless analysis of many videos on a process pool, without any window.
+# Every video is split into segments of frames, the segments are processed by worker processes
+# (each of them imports zadanie6 once, so the shape predictor model is loaded once per process)
+# and the results are merged in the frame order.
+#
+# Every frame gets a state: 0 no face, 1 eyes open, 2 eyes closed (the first detected face decides),
+# 3 for frames of the frame count that could not be read.
+# The output is an event log of intervals with the same state:
+#   video;state;first frame;last frame;start [s];end [s]
+# or with --per-frame a compact binary .npz file with the video number, frame number and state of every frame.
+#
+# usage: python batch_analysis.py video1.mp4 video2.mp4 --processes 4 --segment 500 --output events.csv
+
+# pip install numpy
+# pip install opencv-python
+# pip install dlib
+
+import csv
+import multiprocessing
+import os
+import time
+
+import cv2  # for video reading
+import numpy as np  # for mathematical operations on arrays
+
+NO_FACE, EYES_OPEN, EYES_CLOSED, NOT_READ = 0, 1, 2, 3
+STATE_NAMES = {NO_FACE: 'no face', EYES_OPEN: 'open', EYES_CLOSED: 'closed', NOT_READ: 'not read'}
+
+_zadanie6 = None  # zadanie6 module of the worker process, with its detector and predictor
+
+
+def _init_worker():
+    global _zadanie6
+    import zadanie6  # loads shape_predictor_68_face_landmarks.dat, once per process
+
+    _zadanie6 = zadanie6
+
+
+# Split the videos into segments of at most segment_frames frames.
+def segments(video_paths, segment_frames=500):
+    """
+        segments.
+            Parameters:
+                video_paths: Paths to the video files.
+                segment_frames: Number of frames in one segment.
+            Return:
+                segments (list): (video number, path, first frame, end frame) of every segment, a video
+                                 with an inaccurate seek is one segment.
+    """
+    result = []
+    for number, path in enumerate(video_paths):
+        cap = cv2.VideoCapture(path)
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        size = segment_frames
+        # a segment without an accurate seek decodes all frames before it, together quadratic in the video length
+        if frames > segment_frames and not (cap.set(cv2.CAP_PROP_POS_FRAMES, segment_frames)
+                                            and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == segment_frames):
+            size = frames
+        cap.release()
+        result += [(number, path, start, min(start + size, frames)) for start in range(0, frames, size)]
+    return result
+
+
+# Video opened at the given frame.
+def open_at(path, start):
+    """
+        open_at.
+            Parameters:
+                path: Path to the video file.
+                start: Number of the next frame to read.
+            Return:
+                cap: cv2.VideoCapture, its next frame is start.
+    """
+    cap = cv2.VideoCapture(path)
+    if start == 0 or (cap.set(cv2.CAP_PROP_POS_FRAMES, start) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start):
+        return cap
+    # the seek did not land on the frame although it did in segments (e.g. irregular keyframes),
+    # decode from the beginning
+    cap.release()
+    cap = cv2.VideoCapture(path)
+    for _ in range(start):
+        if not cap.grab():
+            break
+    return cap
+
+
+# Eye state of every frame of one segment, run in a worker process.
+def analyze_segment(segment):
+    """
+        analyze_segment.
+            Parameters:
+                segment: (video number, path, first frame, end frame).
+            Return:
+                result (tuple): video number, first frame, states (int8 array of end - start frames, NOT_READ
+                                for frames that could not be read) and the processing time.
+    """
+    number, path, start, end = segment
+    started = time.perf_counter()
+    cap = open_at(path, start)
+    states = np.full(end - start, NOT_READ, dtype=np.int8)
+    for i in range(end - start):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = _zadanie6.detector(gray)
+        if len(faces) == 0:
+            states[i] = NO_FACE
+        else:
+            eyes_closed = _zadanie6.detect_eyes_closed(_zadanie6.predictor(gray, faces[0]))
+            states[i] = EYES_CLOSED if eyes_closed else EYES_OPEN
+    cap.release()
+    return number, start, states, time.perf_counter() - started
+
+
+# Analyze the videos on a process pool and merge the segments.
+def analyze_videos(video_paths, processes=None, segment_frames=500):
+    """
+        analyze_videos.
+            Parameters:
+                video_paths: Paths to the video files.
+                processes: Number of worker processes, all CPU cores by default.
+                segment_frames: Number of frames in one segment.
+            Return:
+                states (list), seconds (float): state array of every video and the processing time
+                                                summed over all workers.
+    """
+    parts = {number: [] for number in range(len(video_paths))}
+    seconds = 0.
+    with multiprocessing.Pool(processes or os.cpu_count(), _init_worker) as pool:
+        for number, start, states, segment_seconds in pool.imap_unordered(analyze_segment,
+                                                                          segments(video_paths, segment_frames)):
+            parts[number].append((start, states))
+            seconds += segment_seconds
+    states = [np.concatenate([states for _, states in sorted(parts[number], key=lambda part: part[0])])
+              if parts[number] else np.zeros(0, dtype=np.int8) for number in range(len(video_paths))]
+    return states, seconds
+
+
+# Intervals of frames with the same state.
+def events(states):
+    """
+        events.
+            Parameters:
+                states: State array of one video.
+            Return:
+                events (list): (state, first frame, last frame) of every interval.
+    """
+    if len(states) == 0:
+        return []
+    changes = np.flatnonzero(np.diff(states)) + 1
+    starts = np.concatenate([[0], changes])
+    ends = np.concatenate([changes, [len(states)]]) - 1
+    return [(int(states[start]), int(start), int(end)) for start, end in zip(starts, ends)]
+
+
+def save_events(path, video_paths, states):
+    with open(path, 'w', encoding="UTF-8", newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['video', 'state', 'first frame', 'last frame', 'start [s]', 'end [s]'])
+        for video_path, video_states in zip(video_paths, states):
+            cap = cv2.VideoCapture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 1.
+            cap.release()
+            for state, first, last in events(video_states):
+                writer.writerow([video_path, STATE_NAMES[state], first, last,
+                                 '%.3f' % (first / fps), '%.3f' % ((last + 1) / fps)])
+
+
+def save_frames(path, video_paths, states):
+    np.savez_compressed(path, videos=np.array(video_paths),
+                        video=np.concatenate([np.full(len(s), n, dtype=np.int16) for n, s in enumerate(states)]),
+                        frame=np.concatenate([np.arange(len(s), dtype=np.uint32) for s in states]),
+                        state=np.concatenate(states))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Headless closed eyes analysis of video files')
+    parser.add_argument('video_paths', nargs='+')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--segment', type=int, default=500, help='number of frames in one segment')
+    parser.add_argument('--output', default='events.csv', help='with --per-frame the extension is .npz')
+    parser.add_argument('--per-frame', action='store_true', help='state of every frame in a binary .npz file')
+    args = parser.parse_args()
+
+    processes = args.processes or os.cpu_count()
+    start = time.perf_counter()
+    states, worker_seconds = analyze_videos(args.video_paths, processes, args.segment)
+    elapsed = time.perf_counter() - start
+    output = os.path.splitext(args.output)[0] + '.npz' if args.per_frame else args.output
+    if args.per_frame:
+        save_frames(output, args.video_paths, states)
+    else:
+        save_events(output, args.video_paths, states)
+    frames = sum(int(np.count_nonzero(s != NOT_READ)) for s in states)  # only the analysed frames
+    print('%d frames of %d videos in %.2f s: %.1f frames/s, %.1f frames/s per core, saved to %s' % (
+        frames, len(args.video_paths), elapsed, frames / elapsed, frames / worker_seconds if worker_seconds else 0.,
+        output))
@@ -0,0 +1,228 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# Pipelined version of detect_closed_eyes from zadanie6.py.
+# Three stages connected by bounded queues:
+#   reader thread       cap.read(), frames get a sequence number
+#   detection workers   grayscale conversion, detector, predictor and detect_eyes_closed, several threads
+#   output stage        frames are drawn and shown in the sequence order (main thread, cv2.imshow needs it)
+# Offline (default) every frame is processed, a full queue makes the reader wait.
+# Live (--live) the video file is read at its own FPS like a camera and frames that do not fit
+# into the full queue are dropped, so the displayed video does not fall behind.
+# At the end the latency of every stage and the achieved FPS are printed.
+
+# pip install numpy
+# pip install opencv-python
+# pip install dlib
+
+import queue
+import threading
+import time
+
+import cv2  # for video rendering
+import dlib  # for face and landmark detection
+import numpy as np  # for mathematical operations on arrays
+
+from zadanie6 import detect_eyes_closed, display_result, predictor
+
+STAGES = ('read', 'queue', 'detect', 'render', 'total')
+
+
+# Latencies of the pipeline stages
+class PipelineStats:
+
+    def __init__(self):
+        self.latencies = {stage: [] for stage in STAGES}
+        self.lock = threading.Lock()
+        self.dropped = 0
+        self.rendered = 0
+        self.start = time.perf_counter()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.latencies[stage].append(seconds)
+
+    def report(self):
+        """
+            report.
+                Return:
+                    report (dict): mean, p50 and p95 latency of every stage in ms, FPS and dropped frames
+        """
+        elapsed = time.perf_counter() - self.start
+        result = {'fps': self.rendered / elapsed if elapsed else 0., 'rendered': self.rendered,
+                  'dropped': self.dropped}
+        for stage, latencies in self.latencies.items():
+            if latencies:
+                mean = 1000 * np.mean(latencies)
+                p50, p95 = 1000 * np.percentile(latencies, [50, 95])
+                result[stage] = {'mean_ms': mean, 'p50_ms': p50, 'p95_ms': p95}
+        return result
+
+
+# Put into a bounded queue, giving up when the pipeline is stopped
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+# Get from a queue, None when the pipeline is stopped
+def _get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
+
+
+# Reader stage: reads frames and puts them into the frame queue
+def _read_frames(cap, frames, results, workers, live, stop, stats):
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) if live else 0
+        period = 1. / fps if fps > 0 else 0.
+        next_time = time.perf_counter()
+        sequence = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            stats.add('read', time.perf_counter() - start)
+            if not ret:
+                break
+            item = (sequence, frame, time.perf_counter())
+            if live:
+                try:
+                    frames.put_nowait(item)
+                except queue.Full:
+                    stats.dropped += 1  # the pipeline is behind, skip this frame
+                    item = None
+                if period:
+                    next_time += period
+                    time.sleep(max(0., next_time - time.perf_counter()))  # a file is played at its own speed
+            elif not _put(frames, item, stop):
+                break
+            if item is not None:
+                sequence += 1
+    except Exception as error:
+        results.put(error)  # raised again by the output stage, which also stops the workers
+    finally:
+        for _ in range(workers):
+            _put(frames, None, stop)  # the workers finish even when reading failed
+
+
+# Detection stage: faces, landmarks and eye state of every frame
+def _detect(frames, results, stop, stats):
+    try:
+        detector = dlib.get_frontal_face_detector()  # own detector for every worker thread
+        while True:
+            item = _get(frames, stop)
+            if item is None:
+                break
+            sequence, frame, read_time = item
+            start = time.perf_counter()
+            stats.add('queue', start - read_time)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            detections = [(face, detect_eyes_closed(predictor(gray, face))) for face in detector(gray)]
+            stats.add('detect', time.perf_counter() - start)
+            if not _put(results, (sequence, frame, detections, read_time), stop):
+                break
+    except Exception as error:
+        results.put(error)  # raised again by the output stage
+    finally:
+        results.put(None)  # the output stage reads until every worker has finished
+
+
+# Pipelined detecting of closed eyes in a video.
+def detect_closed_eyes_pipelined(video_path, workers=4, queue_size=8, live=False, show=True):
+    """
+            detect_closed_eyes_pipelined.
+                Parameters:
+                    video_path: Path to the video file (or camera number).
+                    workers: Number of detection threads.
+                    queue_size: Capacity of the frame and result queues.
+                    live: Drop frames instead of waiting when the pipeline is behind.
+                    show: Display the video, press 'q' to exit the video window.
+                Return:
+                    report (dict): Stage latencies, FPS and dropped frames.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if show:
+        cv2.namedWindow('Closed Eyes Detection', cv2.WINDOW_NORMAL)
+        cv2.resizeWindow('Closed Eyes Detection', 1080, 1920)
+
+    stats = PipelineStats()
+    stop = threading.Event()
+    frames, results = queue.Queue(queue_size), queue.Queue(queue_size)
+    threads = [threading.Thread(target=_read_frames, args=(cap, frames, results, workers, live, stop, stats),
+                                daemon=True)]
+    threads += [threading.Thread(target=_detect, args=(frames, results, stop, stats), daemon=True)
+                for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    # Output stage: frames finished out of order wait until all earlier frames are rendered
+    pending = {}
+    next_sequence = 0
+    finished = 0
+    error = None
+    while finished < workers:
+        item = results.get()
+        if item is None:
+            finished += 1
+            continue
+        if isinstance(item, Exception):
+            error = error or item
+            stop.set()  # the frame of the failed worker never comes, the other stages are stopped
+            continue
+        if stop.is_set():
+            continue  # only draining the queue so the workers can finish
+        pending[item[0]] = item
+        while next_sequence in pending and not stop.is_set():
+            _, frame, detections, read_time = pending.pop(next_sequence)
+            start = time.perf_counter()
+            for face, eyes_closed in detections:
+                display_result(frame, face, eyes_closed)
+            if show:
+                cv2.imshow('Closed Eyes Detection', frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    stop.set()
+            now = time.perf_counter()
+            stats.add('render', now - start)
+            stats.add('total', now - read_time)
+            stats.rendered += 1
+            next_sequence += 1
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    cap.release()
+    if show:
+        cv2.destroyAllWindows()
+    if error is not None:
+        raise error
+    return stats.report()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pipelined closed eyes detection')
+    parser.add_argument('video_path', nargs='?', default='test_video.mp4', help='video file or camera number')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--queue-size', type=int, default=8)
+    parser.add_argument('--live', action='store_true', help='drop frames when the detection is behind')
+    parser.add_argument('--no-display', action='store_true', help='do not open the video window')
+    args = parser.parse_args()
+
+    video = int(args.video_path) if args.video_path.isdigit() else args.video_path  # camera number or file
+    report = detect_closed_eyes_pipelined(video, args.workers, args.queue_size, args.live,
+                                          not args.no_display)
+    print('%d frames rendered, %d dropped, %.1f FPS' % (report['rendered'], report['dropped'], report['fps']))
+    for stage in STAGES:
+        if stage in report:
+            print('%-7s mean %7.2f ms, p50 %7.2f ms, p95 %7.2f ms' % (
+                stage, report[stage]['mean_ms'], report[stage]['p50_ms'], report[stage]['p95_ms']))
@@ -0,0 +1,215 @@
+# Author: Kamil Kornatowski
+# Author: Adrian Paczewski
+
+# correlation tracker reference: http://dlib.net/correlation_tracker.py.html
+
+# Closed eyes detection with face tracking between detections.
+# The HOG face detector runs on the full frame only every N frames (on a downscaled frame, the rectangles
+# are mapped back to the frame coordinates), or sooner when the tracking confidence of some face drops.
+# In the other frames every face is followed by dlib's correlation tracker and the landmark predictor
+# runs in the tracked box.
+# The comparison mode processes the video twice (detection in every frame and tracking) without a window
+# and reports the agreement of the results and the FPS of both.
+
+# pip install numpy
+# pip install opencv-python
+# pip install dlib
+
+import time
+
+import cv2  # for video rendering
+import dlib  # for face and landmark detection
+import numpy as np  # for mathematical operations on arrays
+
+from zadanie6 import detect_eyes_closed, detector, display_result, predictor
+
+
+# Face detection on a downscaled frame, rectangles in the coordinates of the full frame.
+def detect_faces(gray, scale=1.0):
+    """
+        detect_faces.
+            Parameters:
+                gray: Grayscale frame.
+                scale: Scale of the frame given to the detector, 1.0 for the full frame.
+            Return:
+                faces (list): dlib rectangles of the detected faces.
+    """
+    if scale == 1.0:
+        return list(detector(gray))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return [dlib.rectangle(int(face.left() / scale), int(face.top() / scale),
+                           int(face.right() / scale), int(face.bottom() / scale)) for face in detector(small)]
+
+
+# Faces of the video frames, detected every N frames and tracked in between
+class FaceTracker:
+
+    def __init__(self, detect_every=10, scale=0.5, min_confidence=7.0):
+        """
+            FaceTracker.
+                Parameters:
+                    detect_every: Full detection runs every detect_every frames.
+                    scale: Scale of the frame given to the detector.
+                    min_confidence: Tracking confidence (peak to side lobe ratio) below which the faces
+                                    are detected again.
+        """
+        self.detect_every = detect_every
+        self.scale = scale
+        self.min_confidence = min_confidence
+        self.trackers = []
+        self.frames = 0
+        self.detections = 0
+
+    def faces(self, gray):
+        """
+            faces.
+                Parameters:
+                    gray: Grayscale frame.
+                Return:
+                    faces (list): dlib rectangles of the faces in this frame.
+        """
+        self.frames += 1
+        if (self.frames - 1) % self.detect_every:
+            if not self.trackers:
+                return []  # no face in the last detection, the next one is in at most detect_every frames
+            confidences = [tracker.update(gray) for tracker in self.trackers]
+            if min(confidences) >= self.min_confidence:
+                return [self._rectangle(tracker.get_position()) for tracker in self.trackers]
+        # time for a full detection, no faces tracked yet or the tracking got unsure
+        faces = detect_faces(gray, self.scale)
+        self.detections += 1
+        self.trackers = []
+        for face in faces:
+            tracker = dlib.correlation_tracker()
+            tracker.start_track(gray, face)
+            self.trackers.append(tracker)
+        return faces
+
+    @staticmethod
+    def _rectangle(position):
+        return dlib.rectangle(int(round(position.left())), int(round(position.top())),
+                              int(round(position.right())), int(round(position.bottom())))
+
+
+# Faces and eye states of every frame of the video, without display.
+def analyze(video_path, tracker=None):
+    """
+        analyze.
+            Parameters:
+                video_path: Path to the video file.
+                tracker: FaceTracker, detection in every frame if not given.
+            Return:
+                results (list), seconds (float): (rectangle tuple, eyes closed) pairs of every frame and the time.
+    """
+    cap = cv2.VideoCapture(video_path)
+    results = []
+    start = time.perf_counter()
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = detector(gray) if tracker is None else tracker.faces(gray)
+        results.append([((face.left(), face.top(), face.right(), face.bottom()),
+                         detect_eyes_closed(predictor(gray, face))) for face in faces])
+    seconds = time.perf_counter() - start
+    cap.release()
+    return results, seconds
+
+
+def iou(a, b):
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.
+    intersection = width * height
+    return intersection / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection)
+
+
+# Agreement of the tracked results with detection in every frame.
+def compare(reference, tracked, min_iou=0.5):
+    """
+        compare.
+            Parameters:
+                reference: Results of analyze with detection in every frame.
+                tracked: Results of analyze with a FaceTracker.
+                min_iou: Intersection over union needed to count a tracked face as the detected one.
+            Return:
+                agreement (dict): Share of detected faces that were found, mean IoU of the found faces
+                                  and share of found faces with the same eye state.
+    """
+    found, same_state, overlaps, total = 0, 0, [], 0
+    for detected_faces, tracked_faces in zip(reference, tracked):
+        for box, eyes_closed in detected_faces:
+            total += 1
+            best = max(tracked_faces, key=lambda face: iou(box, face[0]), default=None)
+            if best is not None and iou(box, best[0]) >= min_iou:
+                found += 1
+                overlaps.append(iou(box, best[0]))
+                same_state += best[1] == eyes_closed
+    return {'recall': found / total if total else 1., 'mean_iou': float(np.mean(overlaps)) if overlaps else 0.,
+            'eye_state_agreement': same_state / found if found else 1.}
+
+
+# Detecting closed eyes in a video with face tracking between detections.
+def detect_closed_eyes_tracked(video_path, detect_every=10, scale=0.5):
+    """
+            detect_closed_eyes_tracked.
+                Parameters:
+                    video_path: Path to the video file.
+                    detect_every: Full detection runs every detect_every frames.
+                    scale: Scale of the frame given to the detector.
+                Return:
+                    Displays the video, press 'q' to exit the video window.
+        """
+    cap = cv2.VideoCapture(video_path)
+    cv2.namedWindow('Closed Eyes Detection', cv2.WINDOW_NORMAL)
+    cv2.resizeWindow('Closed Eyes Detection', 1080, 1920)
+    tracker = FaceTracker(detect_every, scale)
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # Face detection or tracking
+        for face in tracker.faces(gray):
+            shape = predictor(gray, face)
+
+            eyes_closed = detect_eyes_closed(shape)
+            display_result(frame, face, eyes_closed)
+
+        cv2.imshow('Closed Eyes Detection', frame)
+
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Closed eyes detection with face tracking')
+    parser.add_argument('video_path', nargs='?', default='test_video.mp4')
+    parser.add_argument('--detect-every', type=int, default=10)
+    parser.add_argument('--scale', type=float, default=0.5, help='scale of the frame given to the detector')
+    parser.add_argument('--compare', action='store_true',
+                        help='compare with detection in every frame instead of displaying the video')
+    args = parser.parse_args()
+
+    if args.compare:
+        reference, reference_time = analyze(args.video_path)
+        face_tracker = FaceTracker(args.detect_every, args.scale)
+        tracked, tracked_time = analyze(args.video_path, face_tracker)
+        agreement = compare(reference, tracked)
+        print('Detection in every frame: %.1f FPS' % (len(reference) / reference_time))
+        print('Tracking: %.1f FPS (%.1fx), full detection in %d of %d frames' % (
+            len(tracked) / tracked_time, reference_time / tracked_time, face_tracker.detections, len(tracked)))
+        print('Faces found %.1f%%, mean IoU %.3f, same eye state %.1f%%' % (
+            100 * agreement['recall'], agreement['mean_iou'], 100 * agreement['eye_state_agreement']))
+    else:
+        detect_closed_eyes_tracked(args.video_path, args.detect_every, args.scale)